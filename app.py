@@ -3,11 +3,28 @@
 import os
 import sys
 from src.exception import CustomException
-from src.logger import logging
+from src.logger import logging, configure_logging
+from src.config.configuration import ConfigurationManager
 from src.pipeline.stage_04_predict_pipeline import CustomData, PredictionPipeline
 import pandas as pd
 import streamlit as st
 
+
+@st.cache_resource
+def get_prediction_pipeline() -> PredictionPipeline:
+    '''
+    This function returns a prediction pipeline shared across all sessions and reruns of the app
+
+    Returns:
+        - PredictionPipeline object
+    '''
+    # runs once per process, like the pipeline itself
+    config = ConfigurationManager().get_prediction_service_config()
+    configure_logging(config.log_level, config.queue_logging, config.request_log_sample_rate)
+
+    return PredictionPipeline()
+
+
 def app():
     '''
     This function is used to create a streamlit app for prediction, it takes input features from the user and predicts the output
@@ -115,11 +132,12 @@ def app():
                             work_industry=work_industry
                         )
 
-                        data = data.get_data_as_dataframe()
+                        data = data.get_data_as_dict()
 
-                        pred_pipeline = PredictionPipeline()
+                        pred_pipeline = get_prediction_pipeline()
 
-                        pred = pred_pipeline.predict(data)
+                        pred, probabilities = pred_pipeline.predict_proba(data)
+                        pred, probabilities = pred[0], probabilities[0]
 
                         # convert the prediction into readable format like 0 for admit and 1 for reject and 2 for waitlist
                         if pred == 0:
@@ -130,6 +148,9 @@ def app():
                             st.info(':neutral_face: You are in the waitlist')
                         else:
                             st.error(':warning: Prediction not found for the given input')
+
+                        # probabilities are ordered by class: reject, admit, waitlist
+                        st.write(f"Reject: {probabilities[0]:.1%} | Admit: {probabilities[1]:.1%} | Waitlist: {probabilities[2]:.1%}")
                     else:
                         st.info(":warning: Please fill all the fields")
                 
@@ -1,44 +1,60 @@
 from src.logger import logging
 import sys
 from src.exception import CustomException
+from src.config.configuration import ConfigurationManager
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.instrumentation import instrumentation
+from src.pipeline.pipeline_runner import Stage, PipelineRunner
 from src.pipeline.stage_01_data_ingestion_pipeline import DataIngestionPipeline
 from src.pipeline.stage_02_data_transformation_pipeline import DataTransformationPipeline
 from src.pipeline.stage_03_model_building_and_evaluation import ModelBuildingPipeline
 
 
+def get_stages(artifact_writer: ArtifactWriter) -> list:
+    '''
+    This function declares the training pipeline, every stage with the values it consumes and produces
+
+    Args:
+        - artifact_writer: Writer persisting the outputs of every stage
+
+    Returns:
+        - list: Stage objects
+    '''
+    return [
+        Stage(
+            name = "Data Ingestion",
+            run = lambda: DataIngestionPipeline(artifact_writer=artifact_writer).main(),
+            outputs = ['training_data', 'testing_data']
+        ),
+        Stage(
+            name = "Data Transformation",
+            run = lambda training_data, testing_data: DataTransformationPipeline(
+                training_data=training_data, testing_data=testing_data, artifact_writer=artifact_writer).main(),
+            inputs = ['training_data', 'testing_data'],
+            outputs = ['train_arr', 'train_target', 'test_arr', 'test_target']
+        ),
+        Stage(
+            name = "Model Building",
+            run = lambda train_arr, train_target, test_arr, test_target: ModelBuildingPipeline(
+                train_array=train_arr, train_target=train_target, test_arr=test_arr, test_target=test_target,
+                artifact_writer=artifact_writer).main(),
+            inputs = ['train_arr', 'train_target', 'test_arr', 'test_target']
+        )
+    ]
 
-STAGE_NAME = "Data Ingestion"
-
-try:
-    logging.info(f"Starting : {STAGE_NAME}")
-    data_ingestion_pipeline = DataIngestionPipeline()
-    training_data, testing_data = data_ingestion_pipeline.main()
-    logging.info(f"Completed {STAGE_NAME} Pipeline")
-
-except CustomException as e:
-    raise CustomException(e, sys)
-
-
-STAGE_NAME = "Data Transformation"
-try:
-    logging.info(f"Starting {STAGE_NAME} Pipeline")
-    data_transformation_pipeline = DataTransformationPipeline(training_data=training_data, testing_data=testing_data)
-    train_arr, test_arr = data_transformation_pipeline.main()
-    logging.info(f"Completed {STAGE_NAME} Pipeline")
-
-except CustomException as e:
-    raise CustomException(e, sys)
-
-
-
-STAGE_NAME = "Model Building"
 
 if __name__ == "__main__":
     try:
-        logging.info(f"Starting {STAGE_NAME} Pipeline")
-        model_building_pipeline = ModelBuildingPipeline(train_array=train_arr, test_arr=test_arr)
-        model_building_pipeline.main()
-        logging.info(f"Completed {STAGE_NAME} Pipeline")
+        config_manager = ConfigurationManager()
+        pipeline_config = config_manager.get_pipeline_config()
+        instrumentation.configure(config_manager.get_instrumentation_config())
+
+        # artifacts are saved in the background while the next stage works on the data handed to it in memory
+        with ArtifactWriter(asynchronous=pipeline_config.async_writes, max_workers=pipeline_config.writer_threads) as artifact_writer:
+            runner = PipelineRunner(get_stages(artifact_writer), max_parallel_stages=pipeline_config.max_parallel_stages)
+            runner.run()
+
+        runner.save_timings(pipeline_config.timings_path)
 
     except CustomException as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
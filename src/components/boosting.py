@@ -0,0 +1,110 @@
+import numpy as np
+import scipy.sparse
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+
+def to_dense(X):
+    '''
+    This function converts sparse features to a dense array, dense features are returned unchanged
+    '''
+    return X.toarray() if scipy.sparse.issparse(X) else X
+
+
+class DenseHistGradientBoostingClassifier(HistGradientBoostingClassifier):
+    '''
+    HistGradientBoostingClassifier that also accepts the sparse features of the compact preprocessing mode.
+    The features are binned into at most 256 values per column, so the dense copy is only needed while binning
+    '''
+    def fit(self, X, y, sample_weight=None):
+        return super().fit(to_dense(X), y, sample_weight=sample_weight)
+
+    def predict(self, X):
+        return super().predict(to_dense(X))
+
+    def predict_proba(self, X):
+        return super().predict_proba(to_dense(X))
+
+    def decision_function(self, X):
+        return super().decision_function(to_dense(X))
+
+
+class EarlyStoppingXGBClassifier(ClassifierMixin, BaseEstimator):
+    '''
+    XGBoost classifier trained with the histogram tree method that stops adding trees once the loss on a validation split
+    held out of the training data stops improving. A hyperparameter search then fits it once per learning rate
+    instead of once per number of trees
+    '''
+    def __init__(self,
+                 learning_rate: float = 0.1,
+                 n_estimators: int = 300,
+                 early_stopping_rounds: int = 10,
+                 validation_fraction: float = 0.1,
+                 max_bin: int = 256,
+                 n_jobs: int = None,
+                 random_state: int = 42):
+        '''
+        Constructor for EarlyStoppingXGBClassifier class
+
+        Args:
+            - learning_rate: Shrinkage applied to every tree
+            - n_estimators: Maximum number of boosting rounds
+            - early_stopping_rounds: Rounds without improvement of the validation loss before training stops
+            - validation_fraction: Fraction of the training data held out to decide when to stop
+            - max_bin: Maximum number of histogram bins per feature
+            - n_jobs: Threads used by XGBoost, None uses all cores
+            - random_state: Seed of the validation split and of XGBoost
+        '''
+        self.learning_rate = learning_rate
+        self.n_estimators = n_estimators
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.max_bin = max_bin
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        '''
+        This function fits the boosted trees, keeping the number of rounds with the lowest validation loss
+
+        Args:
+            - X: Training features, dense or CSR
+            - y: Training labels
+
+        Returns:
+            - self
+        '''
+        from xgboost import XGBClassifier
+        from sklearn.model_selection import train_test_split
+
+        # XGBoost treats the entries absent from a sparse matrix as missing rather than zero,
+        # which would not match the dense features it is served with
+        X = to_dense(X)
+
+        # XGBoost requires the labels to be 0..n_classes-1
+        self.classes_, y_encoded = np.unique(y, return_inverse=True)
+
+        X_fit, X_validation, y_fit, y_validation = train_test_split(
+            X, y_encoded, test_size=self.validation_fraction, stratify=y_encoded, random_state=self.random_state
+        )
+
+        self.booster_ = XGBClassifier(
+            tree_method='hist',
+            learning_rate=self.learning_rate,
+            n_estimators=self.n_estimators,
+            early_stopping_rounds=self.early_stopping_rounds,
+            max_bin=self.max_bin,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state
+        )
+        self.booster_.fit(X_fit, y_fit, eval_set=[(X_validation, y_validation)], verbose=False)
+        self.n_estimators_ = self.booster_.best_iteration + 1
+
+        return self
+
+    def predict_proba(self, X):
+        # XGBoost predicts with the best iteration when early stopping was used
+        return self.booster_.predict_proba(to_dense(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
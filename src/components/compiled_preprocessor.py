@@ -0,0 +1,214 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.logger import logging
+from src.exception import CustomException
+
+
+def is_missing(value) -> bool:
+    '''
+    This function mirrors SimpleImputer(missing_values=np.nan): only NaN is missing, None is an ordinary value
+    '''
+    return isinstance(value, float) and value != value
+
+
+class CompiledPreprocessor:
+    '''
+    Class holding a fitted preprocessor compiled down to NumPy arrays and dictionaries: the imputation values,
+    the means and scales of the numerical features and the output column of every category.
+    It produces the same output as the fitted ColumnTransformer without the pandas and sklearn overhead
+    '''
+    def __init__(self,
+                 numerical_features: list,
+                 numerical_fill: np.ndarray,
+                 means: np.ndarray,
+                 scales: np.ndarray,
+                 categorical_features: list,
+                 categorical_fill: list,
+                 category_columns: list,
+                 n_features_out: int):
+        '''
+        Constructor for CompiledPreprocessor class
+
+        Args:
+            - numerical_features: Names of the numerical features, in output order
+            - numerical_fill: Value used for a missing numerical feature
+            - means: Mean subtracted from each numerical feature
+            - scales: Scale dividing each numerical feature
+            - categorical_features: Names of the categorical features, in output order
+            - categorical_fill: Value used for a missing categorical feature
+            - category_columns: For each categorical feature, a dictionary from category to output column,
+              dropped and unknown categories are absent and produce all zeros
+            - n_features_out: Number of output columns
+        '''
+        self.numerical_features = numerical_features
+        self.numerical_fill = numerical_fill
+        self.means = means
+        self.scales = scales
+        self.categorical_features = categorical_features
+        self.categorical_fill = categorical_fill
+        self.category_columns = category_columns
+        self.n_features_out = n_features_out
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor):
+        '''
+        This function compiles a fitted ColumnTransformer made of a numerical SimpleImputer + StandardScaler pipeline
+        and a categorical SimpleImputer + OneHotEncoder pipeline, as built by DataTransformation.create_preprocessor
+
+        Args:
+            - preprocessor: Fitted ColumnTransformer
+
+        Returns:
+            - CompiledPreprocessor object
+
+        Raises:
+            - CustomException: If the preprocessor contains a step that cannot be compiled
+        '''
+        # only needed to compile, the services unpickling a compiled preprocessor do not import them
+        from sklearn.pipeline import Pipeline
+        from sklearn.impute import SimpleImputer
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+        try:
+            numerical_features, numerical_fill, means, scales = [], [], [], []
+            categorical_features, categorical_fill, category_columns = [], [], []
+            offset = 0
+
+            for name, transformer, columns in preprocessor.transformers_:
+                if isinstance(transformer, str):
+                    if transformer == 'drop':
+                        continue
+                    raise ValueError(f"Transformer {name} cannot be compiled: {transformer}")
+
+                steps = [step for _, step in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+
+                imputer = next((step for step in steps if isinstance(step, SimpleImputer)), None)
+                scaler = next((step for step in steps if isinstance(step, StandardScaler)), None)
+                encoder = next((step for step in steps if isinstance(step, OneHotEncoder)), None)
+
+                unsupported = [step for step in steps if step not in (imputer, scaler, encoder)]
+                if unsupported or (scaler is None) == (encoder is None):
+                    raise ValueError(f"Transformer {name} cannot be compiled: {steps}")
+
+                if scaler is not None:
+                    if offset != len(numerical_features):
+                        raise ValueError("Numerical transformers must come before categorical transformers to be compiled")
+                    for index, column in enumerate(columns):
+                        numerical_features.append(column)
+                        numerical_fill.append(imputer.statistics_[index] if imputer is not None else np.nan)
+                        means.append(scaler.mean_[index] if scaler.with_mean else 0.0)
+                        scales.append(scaler.scale_[index] if scaler.with_std else 1.0)
+                    offset += len(columns)
+                    continue
+
+                drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(columns)
+                for index, column in enumerate(columns):
+                    categorical_features.append(column)
+                    categorical_fill.append(imputer.statistics_[index] if imputer is not None else np.nan)
+
+                    mapping = {}
+                    for category_index, category in enumerate(encoder.categories_[index]):
+                        if category_index == drop_idx[index]:
+                            continue
+                        mapping[category] = offset
+                        offset += 1
+                    category_columns.append(mapping)
+
+            if offset != len(preprocessor.get_feature_names_out()):
+                raise ValueError("Compiled preprocessor does not produce the same number of columns as the ColumnTransformer")
+
+            return cls(
+                numerical_features = numerical_features,
+                numerical_fill = np.array(numerical_fill, dtype=np.float64),
+                means = np.array(means, dtype=np.float64),
+                scales = np.array(scales, dtype=np.float64),
+                categorical_features = categorical_features,
+                categorical_fill = categorical_fill,
+                category_columns = category_columns,
+                n_features_out = offset
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def transform(self, features: pd.DataFrame) -> np.ndarray:
+        '''
+        This function transforms a dataframe of input features
+
+        Args:
+            - features: Dataframe containing the input features
+
+        Returns:
+            - np.ndarray: Transformed features
+        '''
+        n_rows = len(features)
+        output = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+
+        n_numerical = len(self.numerical_features)
+        if n_numerical:
+            numerical = features[self.numerical_features].to_numpy(dtype=np.float64, na_value=np.nan)
+            numerical = np.where(np.isnan(numerical), self.numerical_fill, numerical)
+            output[:, :n_numerical] = (numerical - self.means) / self.scales
+
+        rows = np.arange(n_rows)
+        for column, fill, mapping in zip(self.categorical_features, self.categorical_fill, self.category_columns):
+            values = features[column].to_numpy(dtype=object)
+            output_columns = np.fromiter(
+                (mapping.get(fill if is_missing(value) else value, -1) for value in values),
+                dtype=np.intp,
+                count=n_rows
+            )
+            known = output_columns >= 0
+            output[rows[known], output_columns[known]] = 1.0
+
+        return output
+
+    def transform_record(self, record: dict) -> np.ndarray:
+        '''
+        This function transforms the input features of a single applicant without building a dataframe
+
+        Args:
+            - record: Dictionary from feature name to value
+
+        Returns:
+            - np.ndarray: Transformed features with shape (1, n_features_out)
+        '''
+        output = np.zeros((1, self.n_features_out), dtype=np.float64)
+
+        for index, column in enumerate(self.numerical_features):
+            value = record[column]
+            value = self.numerical_fill[index] if value is None or is_missing(float(value)) else float(value)
+            output[0, index] = (value - self.means[index]) / self.scales[index]
+
+        for column, fill, mapping in zip(self.categorical_features, self.categorical_fill, self.category_columns):
+            value = record[column]
+            output_column = mapping.get(fill if is_missing(value) else value)
+            if output_column is not None:
+                output[0, output_column] = 1.0
+
+        return output
+
+    def verify(self, preprocessor, features: pd.DataFrame):
+        '''
+        This function checks that the compiled preprocessor reproduces the output of the fitted ColumnTransformer
+
+        Args:
+            - preprocessor: Fitted ColumnTransformer the object was compiled from
+            - features: Dataframe of input features to compare on
+
+        Raises:
+            - CustomException: If the outputs differ
+        '''
+        try:
+            expected = preprocessor.transform(features)
+            if hasattr(expected, 'toarray'):
+                expected = expected.toarray()
+
+            if not np.allclose(self.transform(features), expected, rtol=1e-7, atol=1e-9, equal_nan=True):
+                raise ValueError("Compiled preprocessor output differs from the ColumnTransformer output")
+
+            logging.info(f"Compiled preprocessor has been verified on {len(features)} rows")
+
+        except Exception as e:
+            raise CustomException(e, sys)
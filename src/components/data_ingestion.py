@@ -1,54 +1,281 @@
-import pandas as pd
+import os
 import sys
+import json
+import hashlib
+import pandas as pd
 from src.logger import logging
 from src.exception import CustomException
-from src.utils.common import read_sql_data
-from src.entity.config_entity import DataIngestionConfig, DataTransformationConfig
-from src.components.data_transformation import DataTransformation
-from src.components.model_building_and_evaluation import ModelTrainingConfig, ModelBuilding
+from src.utils.common import (read_sql_data,
+                              read_sql_data_in_chunks,
+                              downcast_dtypes,
+                              save_dataframe,
+                              create_directory,
+                              ChunkedDataFrameWriter)
+from src.entity.config_entity import DataIngestionConfig
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.instrumentation import instrumentation
 from sklearn.model_selection import train_test_split
 
 class DataIngestion:
     '''
     Class to ingest data from a source and save it to a destination
     '''
-    def __init__(self, config: DataIngestionConfig):
+    def __init__(self, config: DataIngestionConfig, artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for DataIngestion class
+
+        Args:
+            - config: DataIngestionConfig object
+            - artifact_writer: Writer persisting the raw, train and test data, writes are synchronous by default
+        '''
         self.config = config
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
+
+    def get_query(self) -> str:
+        '''
+        This function builds the query selecting only the configured columns of the admission table
 
-    def initiate_data_ingestion(self) -> pd.DataFrame:
+        Returns:
+            - query: SQL query
+        '''
+        return f"SELECT {', '.join(self.config.columns)} FROM {self.config.table_name}"
+
+    def get_source_fingerprint(self) -> dict:
+        '''
+        This function summarises the current contents of the configured columns of the admission table with a hash of
+        their values, which changes whenever applications are added, removed or edited. The table is streamed in chunks,
+        so only one chunk is held in memory
+
+        Returns:
+            - fingerprint: Row count and sha256 hex digest of the rows ordered by application_id
+        '''
+        digest = hashlib.sha256(json.dumps(self.config.columns).encode())
+        row_count = 0
+
+        for chunk in read_sql_data_in_chunks(f"{self.get_query()} ORDER BY application_id", self.config.chunksize,
+                                             self.config.source, self.config.sqlite_path):
+            digest.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy().tobytes())
+            row_count += len(chunk)
+
+        return {'row_count': str(row_count), 'content_hash': digest.hexdigest()}
+
+    def initiate_data_ingestion(self, in_memory: bool = False):
         '''
         This function reads data from MySQL database, saves raw data to raw data directory, splits data into train and test data, and saves train and test data to train and test data directories
-        
+
+        Args:
+            - in_memory: Return the train and test dataframes instead of their paths, the streaming and incremental modes always return paths
+
         Returns:
-            - train_data_path: Path to train data
-            - test_data_path: Path to test data
+            - train_data: Path to train data, or the train dataframe when in_memory
+            - test_data: Path to test data, or the test dataframe when in_memory
 
         Raises:
             - CustomException: If any error occurs while reading and saving data
         '''
         try:
-            data = read_sql_data()  # replace this with read_csv or read_excel if you are reading from a csv or excel file
+            if self.config.incremental:
+                return self.initiate_incremental_data_ingestion()
 
-            data.to_csv(self.config.raw_data_path, index=False, header=True)
-            logging.info(f"Raw has been saved successfully at {self.config.raw_data_path}")
+            if self.config.streaming:
+                return self.initiate_streaming_data_ingestion()
+
+            with instrumentation.timer("ingestion.read"):
+                data = read_sql_data(self.get_query(), self.config.source, self.config.sqlite_path)  # replace this with read_csv or read_excel if you are reading from a csv or excel file
+            instrumentation.increment("ingestion.rows", len(data))
+
+            self.artifact_writer.submit(save_dataframe, data, self.config.raw_data_path)
+            logging.info(f"Raw data has been handed to the artifact writer for {self.config.raw_data_path}")
 
             logging.info("Splitting data into train and test data")
-            train, test = train_test_split(data, test_size=0.3, random_state=42, stratify=data['admission'])
+            with instrumentation.timer("ingestion.split"):
+                train, test = train_test_split(data, test_size=0.3, random_state=42, stratify=data['admission'])
 
             logging.info("Data has been split successfully")
             logging.info(f"Train data value counts: {train['admission'].value_counts()}")
             logging.info(f"Test data value counts: {test['admission'].value_counts()}")
 
-            train.to_csv(self.config.train_data_path, index=False, header=True)
-            logging.info(f"Train data has been saved successfully at {self.config.train_data_path}")
+            self.artifact_writer.submit(save_dataframe, train, self.config.train_data_path)
+            self.artifact_writer.submit(save_dataframe, test, self.config.test_data_path)
+            logging.info(f"Train and test data have been handed to the artifact writer for {self.config.train_data_path} and {self.config.test_data_path}")
+
+            if in_memory:
+                return train, test
+
+            # the next stage reads the files, so they must be complete
+            self.artifact_writer.flush()
 
-            test.to_csv(self.config.test_data_path, index=False, header=True)
-            logging.info(f"Test data has been saved successfully at {self.config.test_data_path}")
-            
             return (
                 self.config.train_data_path,
                 self.config.test_data_path
             )
         
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def split_chunk(self, chunk: pd.DataFrame):
+        '''
+        This function splits one chunk of data into train and test data, stratified on the target when the chunk allows it
+
+        Args:
+            - chunk: Chunk of data
+
+        Returns:
+            - train: Train part of the chunk
+            - test: Test part of the chunk
+        '''
+        if len(chunk) < 2:
+            return chunk, chunk.iloc[0:0]
+
+        try:
+            return train_test_split(chunk, test_size=0.3, random_state=42, stratify=chunk['admission'].fillna(''))
+        except ValueError:
+            # a class with a single row in this chunk cannot be stratified
+            return train_test_split(chunk, test_size=0.3, random_state=42)
+
+    def write_chunks(self, chunks, raw_data_path, train_data_path, test_data_path):
+        '''
+        This function downcasts each chunk to compact dtypes, splits it into train and test data and appends it to the raw, train and test files
+
+        Args:
+            - chunks: Iterable of data chunks
+            - raw_data_path: Path to raw data
+            - train_data_path: Path to train data
+            - test_data_path: Path to test data
+
+        Returns:
+            - watermark: Largest application_id written, None if no rows were written
+        '''
+        watermark = None
+
+        with ChunkedDataFrameWriter(raw_data_path) as raw_writer, \
+             ChunkedDataFrameWriter(train_data_path) as train_writer, \
+             ChunkedDataFrameWriter(test_data_path) as test_writer:
+
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+
+                chunk = downcast_dtypes(chunk, self.config.categorical_columns, self.config.float_columns)
+                raw_writer.write(chunk)
+
+                train, test = self.split_chunk(chunk)
+                train_writer.write(train)
+                test_writer.write(test)
+
+                chunk_watermark = int(chunk['application_id'].max())
+                watermark = chunk_watermark if watermark is None else max(watermark, chunk_watermark)
+
+        logging.info(f"Raw has been saved successfully at {raw_data_path} ({raw_writer.rows_written} rows)")
+        logging.info(f"Train data has been saved successfully at {train_data_path} ({train_writer.rows_written} rows)")
+        logging.info(f"Test data has been saved successfully at {test_data_path} ({test_writer.rows_written} rows)")
+
+        return watermark
+
+    def initiate_streaming_data_ingestion(self):
+        '''
+        This function reads data from the database in chunks, downcasts each chunk to compact dtypes, splits it into train and test data and appends it to the raw, train and test files, so peak memory is bounded by the chunk size
+
+        Returns:
+            - train_data_path: Path to train data
+            - test_data_path: Path to test data
+
+        Raises:
+            - CustomException: If any error occurs while reading and saving data
+        '''
+        try:
+            chunks = read_sql_data_in_chunks(
+                query = self.get_query(),
+                chunksize = self.config.chunksize,
+                source = self.config.source,
+                sqlite_path = self.config.sqlite_path
+            )
+
+            self.write_chunks(chunks, self.config.raw_data_path, self.config.train_data_path, self.config.test_data_path)
+
+            return (
+                self.config.train_data_path,
+                self.config.test_data_path
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def read_watermark(self):
+        '''
+        This function reads the largest application_id ingested by previous incremental runs
+
+        Returns:
+            - watermark: Largest application_id ingested, None if nothing has been ingested yet
+        '''
+        if not os.path.exists(self.config.watermark_path):
+            return None
+
+        with open(self.config.watermark_path, 'r') as file:
+            return json.load(file)['application_id']
+
+    def write_watermark(self, watermark: int):
+        '''
+        This function stores the largest application_id ingested so far
+
+        Args:
+            - watermark: Largest application_id ingested
+        '''
+        temp_path = f"{self.config.watermark_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({'application_id': watermark}, file)
+        os.replace(temp_path, self.config.watermark_path)
+
+    def initiate_incremental_data_ingestion(self):
+        '''
+        This function reads only the rows whose application_id is above the stored watermark, splits them into train and test data and writes them as a new partition of the raw, train and test stores, then advances the watermark.
+        The cost of a run is proportional to the number of new applications rather than to the whole table
+
+        Returns:
+            - train_data_path: Path to the directory of train data partitions
+            - test_data_path: Path to the directory of test data partitions
+
+        Raises:
+            - CustomException: If any error occurs while reading and saving data
+        '''
+        try:
+            watermark = self.read_watermark()
+            logging.info(f"Ingesting applications after watermark {watermark}")
+
+            query = self.get_query()
+            if watermark is not None:
+                query = f"{query} WHERE application_id > {int(watermark)}"
+
+            chunks = read_sql_data_in_chunks(
+                query = query,
+                chunksize = self.config.chunksize,
+                source = self.config.source,
+                sqlite_path = self.config.sqlite_path
+            )
+
+            partition_paths = {}
+            for store, path in (('raw', self.config.raw_data_path),
+                                ('train', self.config.train_data_path),
+                                ('test', self.config.test_data_path)):
+                store_directory = os.path.join(self.config.partitions_dir, store)
+                create_directory([store_directory], verbose=False)
+
+                # a partition is named after the watermark it starts from, so a failed run is overwritten when it is retried
+                partition_name = f"part-{(watermark or 0):012d}{os.path.splitext(path)[1]}"
+                partition_paths[store] = os.path.join(store_directory, partition_name)
+
+            new_watermark = self.write_chunks(chunks, partition_paths['raw'], partition_paths['train'], partition_paths['test'])
+
+            if new_watermark is None:
+                logging.info("No new applications to ingest")
+            else:
+                self.write_watermark(new_watermark)
+                logging.info(f"Watermark has been advanced to {new_watermark}")
+
+            return (
+                os.path.join(self.config.partitions_dir, 'train'),
+                os.path.join(self.config.partitions_dir, 'test')
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
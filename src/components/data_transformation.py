@@ -3,8 +3,13 @@ import sys
 from src.logger import logging
 from src.exception import CustomException
 from src import *
-from src.utils.common import save_object, save_transformed_data
+from src.utils.common import save_object, save_transformed_data, read_dataframe
 from src.entity.config_entity import DataTransformationConfig
+from src.components.compiled_preprocessor import CompiledPreprocessor
+from src.components.label_encoding import AdmissionLabelEncoder
+from src.components.feature_encoding import normalize_features
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.instrumentation import instrumentation
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
@@ -17,9 +22,17 @@ class DataTransformation:
     Class to transform the data and save the transformed data
     '''
     def __init__(self, 
-                 config: DataTransformationConfig):
-        
+                 config: DataTransformationConfig,
+                 artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for DataTransformation class
+
+        Args:
+            - config: DataTransformationConfig object
+            - artifact_writer: Writer persisting the preprocessors and transformed data, writes are synchronous by default
+        '''
         self.config = config
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
     
     def create_preprocessor(self):
         '''
@@ -55,7 +68,8 @@ class DataTransformation:
             cat_pipeline = Pipeline(
                 steps=[
                     ('imputer', SimpleImputer(strategy='most_frequent')),
-                    ('encoder', OneHotEncoder(handle_unknown='ignore', drop='first', sparse_output=False))
+                    ('encoder', OneHotEncoder(handle_unknown='ignore', drop='first',
+                                              sparse_output=self.config.sparse, dtype=self.config.dtype))
                 ]
             )
 
@@ -66,7 +80,9 @@ class DataTransformation:
                 transformers=[
                     ('num', num_pipeline, numerical_features),
                     ('cat', cat_pipeline, categorical_features)
-                ]
+                ],
+                # in sparse mode the output stays CSR however dense the one-hot block is
+                sparse_threshold=1.0 if self.config.sparse else 0.0
             )
 
             logging.info("Successfully created column transformer")
@@ -81,96 +97,94 @@ class DataTransformation:
         This function transforms the data using the preprocessor object
 
         Args:
-            - training_data: path to the training data
-            - testing_data: path to the testing data
+            - training_data: path to the training data, or the training dataframe
+            - testing_data: path to the testing data, or the testing dataframe
 
         Returns:
-            - train_arr: Transformed training data
-            - test_arr: Transformed testing data
+            - train_arr: Transformed training features, a CSR matrix in sparse mode
+            - train_target: Encoded int8 labels of the training data
+            - test_arr: Transformed testing features, a CSR matrix in sparse mode
+            - test_target: Encoded int8 labels of the testing data
             - preprocessor_obj_path: Path to the preprocessor object
 
         Raises:
             - CustomException: If any error occurs while transforming the data or saving the preprocessor object
         '''
         try:
-            train_data = pd.read_csv(training_data)
-            test_data = pd.read_csv(testing_data)
+            # data handed over in memory by the ingestion stage is used as is
+            with instrumentation.timer("transformation.read"):
+                train_data = training_data if isinstance(training_data, pd.DataFrame) else read_dataframe(training_data)
+                test_data = testing_data if isinstance(testing_data, pd.DataFrame) else read_dataframe(testing_data)
 
             logging.info("Data has been read successfully for data transformation")
 
-            train_data['admission'] = train_data['admission'].replace('', 'Reject').fillna('Reject')
-            test_data['admission'] = test_data['admission'].replace('', 'Reject').fillna('Reject')
-
-            logging.info("Successfully replaced missing values in the target feature")
-
             logging.info("Splitting the data into input features and target feature")
 
-            train_input_features = train_data.drop(columns=['admission', 'application_id'], axis=1)
-            train_target_feature = train_data['admission']
+            # boolean features are encoded as the same categories whatever type the source returned them as
+            train_input_features = normalize_features(train_data.drop(columns=['admission', 'application_id'], axis=1))
+            test_input_features = normalize_features(test_data.drop(columns=['admission', 'application_id'], axis=1))
+
+            # missing decisions are encoded as rejections
+            with instrumentation.timer("transformation.encode_target"):
+                label_encoder = AdmissionLabelEncoder()
+                train_target = label_encoder.encode(train_data['admission'])
+                test_target = label_encoder.encode(test_data['admission'])
 
-            test_input_features = test_data.drop(columns=['admission', 'application_id'], axis=1)
-            test_target_feature = test_data['admission']
+            logging.info("Successfully encoded the target feature to int8 labels for training and testing data")
 
             preprocessor = self.create_preprocessor()
             
             logging.info("Preprocessor object has been initialized successfully")
 
 
-            transformed_train_data = preprocessor.fit_transform(train_input_features)
+            with instrumentation.timer("transformation.fit_transform"):
+                train_arr = preprocessor.fit_transform(train_input_features).astype(self.config.dtype, copy=False)
             logging.info("Training data has been transformed successfully")
 
 
-            transformed_test_data = preprocessor.transform(test_input_features)
+            with instrumentation.timer("transformation.transform"):
+                test_arr = preprocessor.transform(test_input_features).astype(self.config.dtype, copy=False)
             logging.info("Testing data has been transformed successfully")
 
-            train_target_feature = train_target_feature.map({'Admit': 1, 'Reject': 0, 'Waitlist': 2})
-            test_target_feature = test_target_feature.map({'Admit': 1, 'Reject': 0, 'Waitlist': 2})
-
-            logging.info("Successfully mapped the target feature to numerical values for training and testing data")
-
-            logging.info(f'Shape of transformed train data: {transformed_train_data.shape}')
-            logging.info(f'Shape of transformed test data: {transformed_test_data.shape}')
+            logging.info(f'Shape of transformed train data: {train_arr.shape}, {"sparse" if self.config.sparse else "dense"} {train_arr.dtype}')
+            logging.info(f'Shape of transformed test data: {test_arr.shape}, {"sparse" if self.config.sparse else "dense"} {test_arr.dtype}')
 
-
-            train_arr = np.c_[
-                transformed_train_data,
-                np.array(train_target_feature)
-            ]
-
-            test_arr = np.c_[
-                transformed_test_data,
-                np.array(test_target_feature)
-            ]
-
-            logging.info("Successfully concatenated the transformed data with the target feature for training and testing data")
- 
-            save_object(
-                object= preprocessor, 
+            self.artifact_writer.submit(
+                save_object,
+                object = preprocessor,
                 object_path = self.config.preprocessor_obj_path
                 )
-            logging.info(f"Preprocessor object has been saved successfully at {self.config.preprocessor_obj_path}")
+            logging.info(f"Preprocessor object has been handed to the artifact writer for {self.config.preprocessor_obj_path}")
 
-            save_transformed_data(
-                data = train_arr, 
-                path = self.config.train_arr
-            )
+            with instrumentation.timer("transformation.compile"):
+                compiled_preprocessor = CompiledPreprocessor.from_column_transformer(preprocessor)
+                compiled_preprocessor.verify(preprocessor, train_input_features)
+                compiled_preprocessor.verify(preprocessor, test_input_features)
 
-            logging.info(f"Successfully saved transformed train data at {self.config.train_arr}")
-            
-            logging.info("Saving the transformed test data")
-            save_transformed_data(
-                data = test_arr,
-                path = self.config.test_arr
-            )
+            self.artifact_writer.submit(
+                save_object,
+                object = compiled_preprocessor,
+                object_path = self.config.compiled_preprocessor_obj_path
+                )
+            logging.info(f"Compiled preprocessor object has been handed to the artifact writer for {self.config.compiled_preprocessor_obj_path}")
+
+            # the transformed data is returned to the next stage, its files are only read back when the stage is cached
+            for data, path in [(train_arr, self.config.train_arr),
+                               (test_arr, self.config.test_arr),
+                               (train_target, self.config.train_target),
+                               (test_target, self.config.test_target)]:
+                self.artifact_writer.submit(save_transformed_data, data = data, path = path)
 
-            logging.info(f"Successfully saved transformed test data at {self.config.test_arr}")
+            logging.info("Transformed data and targets have been handed to the artifact writer")
 
 
             logging.info("Returning the transformed data")
 
             return (
                 train_arr,
+                train_target,
                 test_arr,
+                test_target,
                 self.config.preprocessor_obj_path
             )
 
@@ -0,0 +1,54 @@
+# boolean features are stored as the strings of the admission table, which is what the fitted encoder knows
+BOOLEAN_FEATURES = ['international']
+BOOLEAN_CATEGORIES = {True: 'True', False: 'False'}
+BOOLEAN_STRINGS = {'true': True, '1': True, 'false': False, '0': False}
+
+
+def normalize_boolean(value):
+    '''
+    This function converts one value of a boolean feature into the category used in training.
+    Booleans, the numbers 0 and 1 and the strings true, false, 1 and 0 in any case are converted, missing values
+    and anything else are returned unchanged, so the encoder treats them as it did during training
+
+    Args:
+        - value: Value of the feature
+
+    Returns:
+        - 'True', 'False' or the value itself
+    '''
+    if isinstance(value, str):
+        return BOOLEAN_CATEGORIES.get(BOOLEAN_STRINGS.get(value.strip().lower()), value)
+
+    try:
+        if value in (0, 1):
+            return BOOLEAN_CATEGORIES[bool(value)]
+    except (TypeError, ValueError):
+        # pd.NA cannot be compared
+        pass
+
+    return value
+
+
+def normalize_features(features):
+    '''
+    This function converts the boolean features of applicants into the categories used in training, shared by
+    data transformation and every prediction entry point so that all input formats reach the preprocessor alike
+
+    Args:
+        - features: Dataframe of applicants, or a dictionary from feature name to value for a single applicant
+
+    Returns:
+        - A copy of the features with normalized boolean features
+    '''
+    if isinstance(features, dict):
+        return {column: normalize_boolean(value) if column in BOOLEAN_FEATURES else value
+                for column, value in features.items()}
+
+    columns = [column for column in BOOLEAN_FEATURES if column in features.columns]
+    if not columns:
+        return features
+
+    features = features.copy()
+    for column in columns:
+        features[column] = features[column].astype(object).map(normalize_boolean)
+    return features
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+
+# code of every admission decision, shared by data transformation and prediction
+ADMISSION_CLASSES = {'Reject': 0, 'Admit': 1, 'Waitlist': 2}
+
+
+class AdmissionLabelEncoder:
+    '''
+    Class to convert the admission decisions into compact integer labels and back.
+    Missing decisions (null or empty string) are treated as rejections, as in the source data
+    '''
+    def __init__(self, classes: dict = ADMISSION_CLASSES, missing_label: str = 'Reject', dtype: str = 'int8'):
+        '''
+        Constructor for AdmissionLabelEncoder class
+
+        Args:
+            - classes: Dictionary from decision to integer code
+            - missing_label: Decision assigned to missing values
+            - dtype: Integer type of the encoded labels
+        '''
+        self.classes = classes
+        self.missing_label = missing_label
+        self.dtype = dtype
+
+    @property
+    def labels(self) -> dict:
+        '''
+        Dictionary from integer code to decision
+        '''
+        return {code: label for label, code in self.classes.items()}
+
+    def encode(self, target: pd.Series) -> np.ndarray:
+        '''
+        This function encodes a column of decisions through a categorical, without an intermediate object array
+
+        Args:
+            - target: Series of decisions
+
+        Returns:
+            - np.ndarray: Integer labels of type dtype
+
+        Raises:
+            - ValueError: If the column contains a decision that is not one of the classes
+        '''
+        categories = list(self.classes)
+        category_codes = pd.Categorical(target, categories=categories).codes
+
+        unmatched = category_codes < 0
+        if unmatched.any():
+            missing = (target.isna() | (target == '')).to_numpy()
+            unknown = unmatched & ~missing
+            if unknown.any():
+                raise ValueError(f"Unknown admission decisions: {sorted(set(target[unknown]))}")
+            category_codes = np.where(unmatched, categories.index(self.missing_label), category_codes)
+
+        class_codes = np.array([self.classes[category] for category in categories], dtype=self.dtype)
+        return class_codes[category_codes]
+
+    def decode(self, labels) -> np.ndarray:
+        '''
+        This function converts integer labels back into decisions
+
+        Args:
+            - labels: Integer labels
+
+        Returns:
+            - np.ndarray: Decisions
+        '''
+        decisions = self.labels
+        return np.array([decisions[int(label)] for label in np.asarray(labels)], dtype=object)
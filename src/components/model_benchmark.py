@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import pickle
+import resource
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+import scipy.sparse
+from concurrent.futures import ProcessPoolExecutor
+from joblib.externals.loky import get_reusable_executor
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.common import search_model, save_transformed_data, load_transformed_data, predict_labels
+from src.entity.config_entity import ModelBenchmarkConfig
+from src.components.data_transformation import DataTransformation
+from src.components.label_encoding import AdmissionLabelEncoder
+from src.components.feature_encoding import normalize_features
+from src.components.model_building_and_evaluation import ModelBuilding
+
+
+WORK_INDUSTRIES = ['Consulting', 'PE/VC', 'Technology', 'Nonprofit/Gov', 'Investment Banking', 'Financial Services',
+                   'Other', 'Health Care', 'Investment Management', 'CPG', 'Real Estate', 'Media/Entertainment',
+                   'Retail', 'Energy']
+
+
+def generate_admission_data(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    '''
+    This function generates synthetic applicants with the columns, categories and class imbalance of the admission table
+
+    Args:
+        - n_rows: Number of applicants
+        - seed: Seed of the random generator
+
+    Returns:
+        - pd.DataFrame: Applicants, missing decisions are null like in the admission table
+    '''
+    rng = np.random.default_rng(seed)
+
+    international = rng.random(n_rows) < 0.28
+    data = pd.DataFrame({
+        'application_id': np.arange(1, n_rows + 1),
+        'gender': rng.choice(['Male', 'Female'], n_rows, p=[0.6, 0.4]),
+        'international': international,
+        'gpa': rng.normal(3.25, 0.15, n_rows).clip(2.6, 3.8).round(2),
+        'major': rng.choice(['Humanities', 'STEM', 'Business'], n_rows, p=[0.4, 0.3, 0.3]),
+        # race is not recorded for international applicants
+        'race': np.where(international, None, rng.choice(['White', 'Asian', 'Black', 'Hispanic', 'Other'], n_rows)),
+        'gmat': rng.normal(651, 49, n_rows).clip(570, 780).round(-1),
+        'work_exp': rng.normal(5, 1, n_rows).clip(1, 9).round(),
+        'work_industry': rng.choice(WORK_INDUSTRIES, n_rows)
+    })
+
+    score = 3 * (data['gpa'] - 3.25) + (data['gmat'] - 651) / 49 + rng.normal(0, 1, n_rows)
+    data['admission'] = np.where(score > 1.3, 'Admit', np.where(score > 1.15, 'Waitlist', None))
+
+    return data
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    '''
+    This function returns the peak resident set size in megabytes of the current process or, with RUSAGE_CHILDREN,
+    of its largest terminated and waited for child process
+    '''
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def benchmark_candidate(model_name: str, model, param: dict, data_paths: dict, search_params: dict,
+                        n_jobs: int, predict_repeats: int) -> dict:
+    '''
+    This function benchmarks one candidate model, it runs in a fresh process so that the peak memory is its own
+
+    Args:
+        - model_name: Name of the model
+        - model: Model object
+        - param: Hyperparameter grid of the model
+        - data_paths: Paths of X_train, y_train, X_test and y_test
+        - search_params: Keyword arguments of the hyperparameter search
+        - n_jobs: Cores given to the search
+        - predict_repeats: Number of single-row predictions timed
+
+    Returns:
+        - dict: Timings in seconds or milliseconds, peak memory in megabytes of the process and of its largest search
+          worker, size in bytes and test accuracy
+    '''
+    data = {name: load_transformed_data(path, mmap_mode=None) for name, path in data_paths.items()}
+    X_train, y_train, X_test, y_test = data['X_train'], data['y_train'], data['X_test'], data['y_test']
+    data_rss_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    _, _, test_metrics, best_model = search_model(model_name, model, param, X_train, X_test, y_train, y_test,
+                                                  n_jobs=n_jobs, search_params=search_params)
+    search_seconds = time.perf_counter() - start
+
+    # the search runs in joblib workers, which only count towards RUSAGE_CHILDREN once they have exited
+    get_reusable_executor().shutdown(wait=True)
+    worker_peak_rss_mb = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    start = time.perf_counter()
+    clone(best_model).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    single_row = X_test[:1]
+    predict_labels(best_model, single_row)
+    latencies = []
+    for _ in range(predict_repeats):
+        start = time.perf_counter()
+        predict_labels(best_model, single_row)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predict_labels(best_model, X_test)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'search_seconds': search_seconds,
+        'fit_seconds': fit_seconds,
+        'single_row_latency_ms_p50': float(np.percentile(latencies, 50) * 1000),
+        'single_row_latency_ms_p95': float(np.percentile(latencies, 95) * 1000),
+        'batch_latency_ms': batch_seconds * 1000,
+        'batch_latency_us_per_row': batch_seconds * 1e6 / X_test.shape[0],
+        'data_rss_mb': data_rss_mb,
+        'peak_rss_mb': max(peak_rss_mb(), worker_peak_rss_mb),
+        'worker_peak_rss_mb': worker_peak_rss_mb,
+        'model_size_bytes': len(pickle.dumps(best_model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'test_accuracy': test_metrics['accuracy'],
+        'best_params': test_metrics['best_params']
+    }
+
+
+class ModelBenchmark:
+    '''
+    Class to measure the cost of every candidate of ModelBuilding at several data sizes
+    '''
+    def __init__(self, config: ModelBenchmarkConfig, data_transformation: DataTransformation, model_building: ModelBuilding):
+        '''
+        Constructor for ModelBenchmark class
+
+        Args:
+            - config: ModelBenchmarkConfig object
+            - data_transformation: DataTransformation whose preprocessor is benchmarked
+            - model_building: ModelBuilding whose candidate models and grids are benchmarked
+        '''
+        self.config = config
+        self.data_transformation = data_transformation
+        self.model_building = model_building
+
+    def prepare_data(self, n_rows: int, directory: str):
+        '''
+        This function generates and transforms n_rows applicants as DataTransformation would, and saves the arrays
+
+        Args:
+            - n_rows: Number of applicants
+            - directory: Directory to save the arrays to
+
+        Returns:
+            - data_paths: Paths of X_train, y_train, X_test and y_test
+            - data_report: Sizes of the data and time taken to prepare it
+        '''
+        start = time.perf_counter()
+
+        data = generate_admission_data(n_rows, seed=self.config.seed)
+        train_data, test_data = train_test_split(data, test_size=self.config.test_size, random_state=self.config.seed)
+
+        features = ['gender', 'international', 'gpa', 'major', 'race', 'gmat', 'work_exp', 'work_industry']
+        preprocessor = self.data_transformation.create_preprocessor()
+        dtype = self.data_transformation.config.dtype
+        X_train = preprocessor.fit_transform(normalize_features(train_data[features])).astype(dtype, copy=False)
+        X_test = preprocessor.transform(normalize_features(test_data[features])).astype(dtype, copy=False)
+
+        label_encoder = AdmissionLabelEncoder()
+        y_train = label_encoder.encode(train_data['admission'])
+        y_test = label_encoder.encode(test_data['admission'])
+
+        extension = '.npz' if scipy.sparse.issparse(X_train) else '.npy'
+        data_paths = {
+            'X_train': os.path.join(directory, f'X_train{extension}'),
+            'y_train': os.path.join(directory, 'y_train.npy'),
+            'X_test': os.path.join(directory, f'X_test{extension}'),
+            'y_test': os.path.join(directory, 'y_test.npy')
+        }
+        for name, array in zip(data_paths, (X_train, y_train, X_test, y_test)):
+            save_transformed_data(data=array, path=data_paths[name])
+
+        data_report = {
+            'rows': n_rows,
+            'train_rows': int(X_train.shape[0]),
+            'test_rows': int(X_test.shape[0]),
+            'n_features': int(X_train.shape[1]),
+            'prepare_seconds': time.perf_counter() - start
+        }
+
+        return data_paths, data_report
+
+    def initiate_model_benchmark(self) -> dict:
+        '''
+        This function benchmarks every candidate model at every scale and saves the results next to the model metrics
+
+        Returns:
+            - results: Dictionary from number of applicants to the data report and the benchmark of every model
+
+        Raises:
+            - CustomException: If any error occurs while preparing the data or saving the results
+        '''
+        try:
+            models, params = self.model_building.get_search_candidates()
+            results = {}
+
+            for n_rows in self.config.scales:
+                with tempfile.TemporaryDirectory() as directory:
+                    data_paths, data_report = self.prepare_data(n_rows, directory)
+                    logging.info(f"Benchmarking {len(models)} models on {n_rows} applicants: {data_report}")
+
+                    model_reports = {}
+                    for model_name, model in models.items():
+                        max_train_rows = self.config.max_train_rows.get(model_name)
+                        if max_train_rows is not None and data_report['train_rows'] > max_train_rows:
+                            logging.info(f"Skipping {model_name} on {n_rows} applicants, above {max_train_rows} training rows")
+                            model_reports[model_name] = {'skipped': f'more than {max_train_rows} training rows'}
+                            continue
+
+                        # a fresh process per candidate, so its peak memory is not inflated by the previous ones
+                        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                            try:
+                                model_reports[model_name] = executor.submit(
+                                    benchmark_candidate, model_name, model, params[model_name], data_paths,
+                                    self.config.search_params, self.config.n_jobs, self.config.predict_repeats
+                                ).result()
+                            except Exception as e:
+                                logging.error(f"Benchmark of {model_name} on {n_rows} applicants failed: {e}")
+                                model_reports[model_name] = {'error': str(e)}
+
+                        logging.info(f"{model_name} on {n_rows} applicants: {model_reports[model_name]}")
+
+                    results[str(n_rows)] = {'data': data_report, 'models': model_reports}
+
+            with open(self.config.results_path, 'w') as file:
+                json.dump(results, file, indent=4, default=str)
+            logging.info(f"Benchmark results have been saved at {self.config.results_path}")
+
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -5,139 +5,224 @@ from src import *
 from src.utils.common import (save_object, 
                               eval_model, 
                               save_model_metrics)
-from imblearn.over_sampling import SMOTE
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import (RandomForestClassifier, 
-                              GradientBoostingClassifier, 
                               AdaBoostClassifier)
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.model_selection import StratifiedKFold
 from sklearn.neighbors import KNeighborsClassifier
-from xgboost import XGBClassifier
+from src.components.boosting import DenseHistGradientBoostingClassifier, EarlyStoppingXGBClassifier
+from src.components.resampling import with_resampling
 from src.entity.config_entity import ModelTrainingConfig
+from src.utils.artifact_writer import ArtifactWriter
 from urllib.parse import urlparse
 import mlflow
 class ModelBuilding:
     '''
     Class to build and evaluate models
     '''
-    def __init__(self, config: ModelTrainingConfig):
+    def __init__(self, config: ModelTrainingConfig, artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for ModelBuilding class
+
+        Args:
+            - config: ModelTrainingConfig object
+            - artifact_writer: Writer persisting the metrics and the best model, writes are synchronous by default
+        '''
         self.config = config
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
 
-    def initiate_model_building(self, train_arr, test_arr):
+    def get_models(self) -> dict:
         '''
-        This function initiates model building process, splits data into train and test sets, specifies models to be trained, hyperparameter tuning for models, model training and evaluation, saves model and metrics, and saves the best model
-        
+        This function returns the candidate models, keyed by name
+        '''
+        return {
+            "LogisticRegression": LogisticRegression(),
+            "RandomForestClassifier": RandomForestClassifier(),
+            "DecisionTreeClassifier": DecisionTreeClassifier(),
+            # boosted models stop adding trees once a held out validation split stops improving,
+            # so they are searched over the learning rate only
+            "HistGradientBoostingClassifier": DenseHistGradientBoostingClassifier(max_iter=300, early_stopping=True,
+                                                                                  validation_fraction=0.1,
+                                                                                  n_iter_no_change=10,
+                                                                                  random_state=42),
+            "AdaBoostClassifier": AdaBoostClassifier(),
+            # the services return the most probable class, Platt scaling fitted once on out-of-fold decisions
+            # gives SVC probabilities without the internal cross validation of SVC(probability=True)
+            "SVC": CalibratedClassifierCV(SVC(), method='sigmoid', ensemble=False,
+                                          cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42)),
+            "KNeighborsClassifier": KNeighborsClassifier(),
+            "XGBClassifier": EarlyStoppingXGBClassifier(n_estimators=300, early_stopping_rounds=10)
+        }
+
+    def get_params(self) -> dict:
+        '''
+        This function returns the hyperparameter grid of every candidate model, keyed by name
+        '''
+        return {
+            "LogisticRegression": {
+                "C": [0.01, 0.1, 1]
+            },
+
+            "RandomForestClassifier": {
+                "n_estimators": [100, 200, 300],
+                "max_depth": [5, 10, 15, 20]
+            },  
+
+            "DecisionTreeClassifier": {
+                "max_depth": [5, 10, 20, 30],
+                "min_samples_split": [ 5, 10, 15]
+            },
+
+            "HistGradientBoostingClassifier": {
+                "learning_rate": [0.01, 0.1, 1]
+            },
+
+            "AdaBoostClassifier": {
+                "n_estimators": [50, 100, 200, 300],
+                "learning_rate": [0.01, 0.1, 1]
+            },
+
+            "SVC": {
+                "estimator__C": [0.01, 0.1, 1],
+                "estimator__degree": [3, 4, 5]
+            },
+
+            "KNeighborsClassifier": {
+                "n_neighbors": [3, 5, 7],
+                "weights": ['uniform', 'distance']
+            },
+
+            "XGBClassifier": {
+                "learning_rate": [0.01, 0.1, 1]
+            }
+        }
+
+    def get_search_candidates(self):
+        '''
+        This function wraps every candidate model with the resampling strategy of the configuration file
+
+        Returns:
+            - models: Candidate models, resampling their training folds
+            - params: Hyperparameter grids matching the wrapped models
+        '''
+        strategy = self.config.resampling_params.get('strategy', 'smote')
+        max_neighbor_samples = self.config.resampling_params.get('max_neighbor_samples', 10000)
+
+        models, params = {}, {}
+        for model_name, model in self.get_models().items():
+            models[model_name], params[model_name] = with_resampling(model, self.get_params()[model_name],
+                                                                     strategy, max_neighbor_samples)
+
+        logging.info(f"Candidate models resample their training folds with strategy {strategy}")
+
+        return models, params
+
+    def select_best_model(self, test_metrics: dict) -> str:
+        '''
+        This function selects the model to serve according to the selection objective of the configuration file
+
         Args:
-            - train_arr: Training data
-            - test_arr: Testing data
-            
+            - test_metrics: Test metrics of every model, including their predict latency and size
+
         Returns:
-            - best_model: Best model
-            - best_model_score: Best model score
-            
+            - best_model_name: Name of the selected model
+
         Raises:
-            - CustomException: If any error occurs while initiating model building or saving the best model
+            - ValueError: If the objective is unknown
         '''
+        objective = self.config.selection_params.get('objective', 'accuracy')
 
-        try:
-            X_train = train_arr[:, :-1]
-            y_train = train_arr[:, -1]
-            X_test = test_arr[:, :-1]
-            y_test = test_arr[:, -1]
-
-            logging.info("Splitting has been done successfully for model building")
-            # doing oversampling as the data is imbalanced
-            sm = SMOTE(random_state=42)
-
-            X_train, y_train = sm.fit_resample(X_train, y_train)
-
-            logging.info("Oversampling has been done successfully")
-
-            models = {
-                "LogisticRegression": LogisticRegression(),
-                "RandomForestClassifier": RandomForestClassifier(),
-                "DecisionTreeClassifier": DecisionTreeClassifier(),
-                "GradientBoostingClassifier": GradientBoostingClassifier(),
-                "AdaBoostClassifier": AdaBoostClassifier(),
-                "SVC": SVC(),
-                "KNeighborsClassifier": KNeighborsClassifier(),
-                "XGBClassifier": XGBClassifier()
-            }
-
-            logging.info("Models have been specified successfully")
+        if objective == 'accuracy':
+            return max(test_metrics, key=lambda x: test_metrics[x]['accuracy'])
 
+        if objective == 'accuracy_per_ms':
+            return max(test_metrics, key=lambda x: test_metrics[x]['accuracy'] / max(test_metrics[x]['predict_latency_ms'], 1e-3))
 
-            params = {
-                "LogisticRegression": {
-                    "C": [0.01, 0.1, 1]
-                },
+        if objective == 'accuracy_within_slo':
+            latency_slo_ms = self.config.selection_params['latency_slo_ms']
+            max_model_size_bytes = self.config.selection_params['max_model_size_mb'] * 1024 * 1024
 
-                "RandomForestClassifier": {
-                    "n_estimators": [100, 200, 300],
-                    "max_depth": [5, 10, 15, 20]
-                },  
+            eligible = [
+                name for name, metrics in test_metrics.items()
+                if metrics['predict_latency_ms'] <= latency_slo_ms and metrics['model_size_bytes'] <= max_model_size_bytes
+            ]
+            logging.info(f"Models within {latency_slo_ms} ms and {self.config.selection_params['max_model_size_mb']} MB: {eligible}")
 
-                "DecisionTreeClassifier": {
-                    "max_depth": [5, 10, 20, 30],
-                    "min_samples_split": [ 5, 10, 15]
-                },
+            if not eligible:
+                logging.warning("No model meets the latency and size budget, selecting the fastest model")
+                return min(test_metrics, key=lambda x: test_metrics[x]['predict_latency_ms'])
 
-                "GradientBoostingClassifier": {
-                    "n_estimators": [100, 200, 300],
-                    "learning_rate": [0.01, 0.1, 1]
-                },
+            return max(eligible, key=lambda x: test_metrics[x]['accuracy'])
 
-                "AdaBoostClassifier": {
-                    "n_estimators": [50, 100, 200, 300],
-                    "learning_rate": [0.01, 0.1, 1]
-                },
+        raise ValueError(f"Unknown model selection objective: {objective}")
 
-                "SVC": {
-                    "C": [0.01, 0.1, 1],
-                    "degree": [3, 4, 5]
-                },
+    def initiate_model_building(self, train_arr, train_target, test_arr, test_target):
+        '''
+        This function initiates model building process, splits data into train and test sets, specifies models to be trained, hyperparameter tuning for models, model training and evaluation, saves model and metrics, and saves the best model
+        
+        Args:
+            - train_arr: Training features, dense or CSR
+            - train_target: Encoded labels of the training data
+            - test_arr: Testing features, dense or CSR
+            - test_target: Encoded labels of the testing data
+            
+        Returns:
+            - best_model: Best model
+            - best_model_score: Best model score
+            
+        Raises:
+            - CustomException: If any error occurs while initiating model building or saving the best model
+        '''
 
-                "KNeighborsClassifier": {
-                    "n_neighbors": [3, 5, 7],
-                    "weights": ['uniform', 'distance']
-                },
+        try:
+            X_train, y_train = train_arr, train_target
+            X_test, y_test = test_arr, test_target
 
-                "XGBClassifier": {
-                    "n_estimators": [100, 200, 300],
-                    "learning_rate": [0.01, 0.1, 1]
-                }
-            }
+            # the data is imbalanced, the candidates oversample each training fold rather than the whole training data,
+            # so the validation folds keep the true class balance
+            models, params = self.get_search_candidates()
 
-            logging.info("Hyperparameter tuning has been done successfully")
+            logging.info("Models and hyperparameter grids have been specified successfully")
 
 
             # Evaluate models
-            training_metrics, test_metrics = eval_model(X_train, X_test, y_train, y_test, models, params)
+            logging.info(f"Searching hyperparameters with {self.config.search_params}")
+
+            training_metrics, test_metrics, fitted_models = eval_model(X_train, X_test, y_train, y_test, models, params,
+                                                                       n_jobs=self.config.n_jobs,
+                                                                       search_params=self.config.search_params,
+                                                                       checkpoint_dir=str(self.config.checkpoint_dir or ''))
 
             logging.info("Model training and evaluation has been done successfully")
             
-            # Save model metrics
-            save_model_metrics(
+            # Save model metrics, in the background while the best model is selected and tracked
+            self.artifact_writer.submit(
+                save_model_metrics,
                 report = training_metrics,
                 path = self.config.training_metrics
             )
 
-            save_model_metrics(
+            self.artifact_writer.submit(
+                save_model_metrics,
                 report = test_metrics,
                 path = self.config.test_metrics
             )
 
             
-            logging.info(f"Model metrics have been saved successfully at {self.config.training_metrics} and {self.config.test_metrics}")
+            logging.info(f"Model metrics have been handed to the artifact writer for {self.config.training_metrics} and {self.config.test_metrics}")
 
-            # Select the best model based on test accuracy
-            best_model_score = max(test_metrics.values(), key=lambda x: x['accuracy'])['accuracy']
-            best_model_name = max(test_metrics, key=lambda x: test_metrics[x]['accuracy'])
+            # Select the best model according to the selection objective
+            best_model_name = self.select_best_model(test_metrics)
+            best_model_score = test_metrics[best_model_name]['accuracy']
 
-            best_model = models[best_model_name]
+            best_model = fitted_models[best_model_name]
 
-            logging.info(f"The best model is {best_model_name} with an accuracy score of {best_model_score}")
+            logging.info(f"The best model is {best_model_name} with an accuracy score of {best_model_score}, "
+                         f"{test_metrics[best_model_name]['predict_latency_ms']:.2f} ms single-row latency "
+                         f"and {test_metrics[best_model_name]['model_size_bytes']} bytes")
 
 
             logging.info("Tracking the best model using MLflow")
@@ -158,6 +243,8 @@ class ModelBuilding:
                 mlflow.log_metric("Precision", test_metrics[best_model_name]['precision'])
                 mlflow.log_metric("Recall", test_metrics[best_model_name]['recall'])
                 mlflow.log_metric("F1 Score", test_metrics[best_model_name]['f1_score'])
+                mlflow.log_metric("Predict Latency ms", test_metrics[best_model_name]['predict_latency_ms'])
+                mlflow.log_metric("Model Size bytes", test_metrics[best_model_name]['model_size_bytes'])
                 # mlflow.log_metric("Confusion Matrix", test_metrics[best_model_name]['confusion_matrix'])
 
             if tracking_uri_type != "file":
@@ -169,12 +256,13 @@ class ModelBuilding:
             if best_model_score < 0.75:
                 logging.warning("Model performance is below 75%. Please consider retraining the model")
 
-            save_object(
+            self.artifact_writer.submit(
+                save_object,
                 object = best_model,
                 object_path = self.config.model_path
             )
 
-            logging.info(f"Best model has been saved successfully at {self.config.model_path}")
+            logging.info(f"Best model has been handed to the artifact writer for {self.config.model_path}")
 
             return best_model, best_model_score
 
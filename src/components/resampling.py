@@ -0,0 +1,120 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import NearestNeighbors
+from imblearn.over_sampling import SMOTE, RandomOverSampler
+from imblearn.pipeline import Pipeline
+
+
+RESAMPLING_STRATEGIES = ['smote', 'approximate_smote', 'random_oversampling', 'class_weight', 'none']
+
+
+class SubsampledNearestNeighbors(BaseEstimator):
+    '''
+    Nearest neighbour search against a random subsample of the fitted points, used by SMOTE to find the neighbours
+    of every minority sample without building an index over the whole class. The neighbours are approximate,
+    the cost of a query grows with max_samples instead of with the size of the class
+    '''
+    def __init__(self, n_neighbors: int = 6, max_samples: int = 10000, random_state: int = 42):
+        '''
+        Constructor for SubsampledNearestNeighbors class
+
+        Args:
+            - n_neighbors: Number of neighbours returned, SMOTE drops the first one
+            - max_samples: Maximum number of fitted points indexed
+            - random_state: Seed of the subsample
+        '''
+        self.n_neighbors = n_neighbors
+        self.max_samples = max_samples
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        n_samples = X.shape[0]
+        self.n_samples_fit_ = n_samples
+        if n_samples > self.max_samples:
+            rng = np.random.default_rng(self.random_state)
+            self.sample_indices_ = np.sort(rng.choice(n_samples, self.max_samples, replace=False))
+        else:
+            self.sample_indices_ = np.arange(n_samples)
+
+        self.nn_ = NearestNeighbors(n_neighbors=min(self.n_neighbors, len(self.sample_indices_)))
+        self.nn_.fit(X[self.sample_indices_])
+        return self
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        '''
+        This function returns the neighbours of X among the indexed points, as indices into the fitted data
+        '''
+        result = self.nn_.kneighbors(X, n_neighbors=n_neighbors, return_distance=return_distance)
+        if return_distance:
+            distances, indices = result
+            return distances, self.sample_indices_[indices]
+        return self.sample_indices_[result]
+
+    def kneighbors_graph(self, X=None, n_neighbors=None, mode='connectivity'):
+        '''
+        This function returns the neighbours of X among the indexed points as a sparse graph with one column per
+        fitted point, the columns of the points left out of the subsample are empty
+        '''
+        graph = self.nn_.kneighbors_graph(X, n_neighbors=n_neighbors, mode=mode)
+        return csr_matrix((graph.data, self.sample_indices_[graph.indices], graph.indptr),
+                          shape=(graph.shape[0], self.n_samples_fit_))
+
+
+def get_resampler(strategy: str, max_neighbor_samples: int = 10000):
+    '''
+    This function creates the resampler applied to the training folds
+
+    Args:
+        - strategy: One of RESAMPLING_STRATEGIES, class_weight and none do not resample
+        - max_neighbor_samples: Points of each class indexed by approximate_smote
+
+    Returns:
+        - resampler: imblearn sampler, None when the strategy does not resample
+
+    Raises:
+        - ValueError: If the strategy is unknown
+    '''
+    if strategy == 'smote':
+        return SMOTE(random_state=42)
+
+    if strategy == 'approximate_smote':
+        return SMOTE(k_neighbors=SubsampledNearestNeighbors(n_neighbors=6, max_samples=max_neighbor_samples),
+                     random_state=42)
+
+    if strategy == 'random_oversampling':
+        return RandomOverSampler(random_state=42)
+
+    if strategy in ('class_weight', 'none'):
+        return None
+
+    raise ValueError(f"Unknown resampling strategy: {strategy}, expected one of {RESAMPLING_STRATEGIES}")
+
+
+def with_resampling(model, param: dict, strategy: str, max_neighbor_samples: int = 10000):
+    '''
+    This function wraps a model so that its training data is resampled inside every cross validation fold,
+    the validation folds and the test data are never resampled
+
+    Args:
+        - model: Model object
+        - param: Hyperparameter grid of the model
+        - strategy: One of RESAMPLING_STRATEGIES
+        - max_neighbor_samples: Points of each class indexed by approximate_smote
+
+    Returns:
+        - model: imblearn Pipeline of the resampler and the model, or the model itself when nothing is resampled
+        - param: Hyperparameter grid with the names of the pipeline step
+    '''
+    if strategy == 'class_weight':
+        if 'class_weight' in model.get_params():
+            return model.set_params(class_weight='balanced'), param
+        # models without class weights fall back to the cheapest resampler
+        strategy = 'random_oversampling'
+
+    resampler = get_resampler(strategy, max_neighbor_samples)
+    if resampler is None:
+        return model, param
+
+    pipeline = Pipeline(steps=[('resampler', resampler), ('model', model)])
+    return pipeline, {f'model__{name}': values for name, values in param.items()}
@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import numpy as np
+from src.logger import logging
+from src.exception import CustomException
+from src.entity.config_entity import StartupBenchmarkConfig
+
+
+# applicant scored by the first prediction
+SAMPLE_APPLICANT = {'gender': 'Male', 'international': False, 'gpa': 3.5, 'major': 'STEM', 'race': 'Asian',
+                    'gmat': 700.0, 'work_exp': 5.0, 'work_industry': 'Consulting'}
+
+# runs in a fresh interpreter: imports the module, optionally scores one applicant, and reports the timings
+# and the training modules that were imported on the way
+STARTUP_PROBE = '''
+import sys, json, time, importlib
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+report = {'import_seconds': time.perf_counter() - start}
+probe = json.loads(sys.argv[2])
+if probe['applicant'] is not None:
+    from src.pipeline.stage_04_predict_pipeline import PredictionPipeline
+    start = time.perf_counter()
+    PredictionPipeline().predict_proba(probe['applicant'])
+    report['first_prediction_seconds'] = time.perf_counter() - start
+report['training_modules'] = [name for name in probe['training_modules'] if name in sys.modules]
+print(json.dumps(report))
+'''
+
+
+class StartupBenchmark:
+    '''
+    Class to measure the cold start of the serving entry points, each one is imported in a fresh interpreter
+    so that nothing is shared with the previous measurements
+    '''
+    def __init__(self, config: StartupBenchmarkConfig):
+        '''
+        Constructor for StartupBenchmark class
+
+        Args:
+            - config: StartupBenchmarkConfig object
+        '''
+        self.config = config
+
+    def run_probe(self, module: str, applicant: dict = None) -> dict:
+        '''
+        This function starts one interpreter that imports the module and, when an applicant is given, predicts it
+
+        Args:
+            - module: Module imported by the interpreter
+            - applicant: Applicant scored after the import, None to only import
+
+        Returns:
+            - dict: Import, first prediction and process time in seconds, and the training modules imported
+
+        Raises:
+            - RuntimeError: If the interpreter fails
+        '''
+        probe = json.dumps({'applicant': applicant, 'training_modules': self.config.training_modules})
+
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', STARTUP_PROBE, module, probe],
+                                   capture_output=True, text=True, cwd=os.getcwd(),
+                                   env={**os.environ, 'PYTHONPATH': os.getcwd()})
+        process_seconds = time.perf_counter() - start
+
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed: {completed.stderr.strip().splitlines()[-1:]}")
+
+        return {**json.loads(completed.stdout.strip().splitlines()[-1]), 'process_seconds': process_seconds}
+
+    def benchmark(self, module: str, applicant: dict = None) -> dict:
+        '''
+        This function runs the probe of a module config.repeats times and summarizes the timings
+
+        Args:
+            - module: Module imported by the interpreters
+            - applicant: Applicant scored after the import, None to only import
+
+        Returns:
+            - dict: Median, minimum and maximum of every timing in seconds, and the training modules imported
+        '''
+        probes = [self.run_probe(module, applicant) for _ in range(self.config.repeats)]
+
+        report = {}
+        for timing in [key for key in probes[0] if key.endswith('_seconds')]:
+            values = [probe[timing] for probe in probes]
+            report[timing] = {'median': float(np.median(values)), 'min': min(values), 'max': max(values)}
+        report['training_modules'] = probes[0]['training_modules']
+
+        return report
+
+    def initiate_startup_benchmark(self) -> dict:
+        '''
+        This function benchmarks the import of every serving entry point and, when configured, the first prediction,
+        and saves the results
+
+        Returns:
+            - results: Dictionary from entry point to its timings, the first prediction is reported as first_prediction
+
+        Raises:
+            - CustomException: If any error occurs while saving the results
+        '''
+        try:
+            results = {}
+
+            for module in self.config.modules:
+                try:
+                    results[module] = self.benchmark(module)
+                except Exception as e:
+                    logging.error(f"Startup benchmark of {module} failed: {e}")
+                    results[module] = {'error': str(e)}
+
+                logging.info(f"Startup of {module}: {results[module]}")
+
+            if self.config.first_prediction:
+                try:
+                    results['first_prediction'] = self.benchmark('src.pipeline.stage_04_predict_pipeline', SAMPLE_APPLICANT)
+                except Exception as e:
+                    logging.error(f"Startup benchmark of the first prediction failed, has the model been trained? {e}")
+                    results['first_prediction'] = {'error': str(e)}
+
+                logging.info(f"Startup of the first prediction: {results['first_prediction']}")
+
+            with open(self.config.results_path, 'w') as file:
+                json.dump(results, file, indent=4)
+            logging.info(f"Startup benchmark results have been saved at {self.config.results_path}")
+
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,9 +1,12 @@
+import os
 import sys
 from src.logger import logging
 from src.exception import CustomException
 from src import *
 from src.utils.common import read_yaml_file, create_directory
-from src.entity.config_entity import (DataIngestionConfig, DataTransformationConfig, ModelTrainingConfig)
+from src.entity.config_entity import (DataIngestionConfig, DataTransformationConfig, ModelTrainingConfig, StageCacheConfig,
+                                     PredictionServiceConfig, ModelBenchmarkConfig, PipelineConfig,
+                                     InstrumentationConfig, StartupBenchmarkConfig)
 
 class ConfigurationManager:
     '''
@@ -40,7 +43,18 @@ class ConfigurationManager:
             data_ingestion_config = DataIngestionConfig(
                 raw_data_path = config.raw_data_path,
                 train_data_path = config.train_data_path,
-                test_data_path = config.test_data_path
+                test_data_path = config.test_data_path,
+                source = config.source,
+                sqlite_path = config.sqlite_path,
+                table_name = config.table_name,
+                columns = list(config.columns),
+                streaming = config.streaming,
+                chunksize = config.chunksize,
+                incremental = config.incremental,
+                watermark_path = config.watermark_path,
+                partitions_dir = config.partitions_dir,
+                categorical_columns = list(config.categorical_columns),
+                float_columns = list(config.float_columns)
             )
 
             logging.info("Paths have been assigned successfully to raw data, train data and test data")
@@ -68,11 +82,16 @@ class ConfigurationManager:
 
             data_transformation_config = DataTransformationConfig(
                 preprocessor_obj_path = config.preprocessor_obj_path,
+                compiled_preprocessor_obj_path = config.compiled_preprocessor_obj_path,
                 train_arr = config.train_arr_path,
-                test_arr = config.test_arr_path
+                test_arr = config.test_arr_path,
+                train_target = config.train_target_path,
+                test_target = config.test_target_path,
+                sparse = config.sparse,
+                dtype = config.dtype
             )
 
-            logging.info("Paths have been assigned successfully to preprocessor object, train array and test array")
+            logging.info("Paths have been assigned successfully to preprocessor object, train array, test array and their targets")
 
             logging.info("Returning data transformation config")
             return data_transformation_config
@@ -98,6 +117,11 @@ class ConfigurationManager:
                 model_path = config.model_path,
                 training_metrics = config.training_metrics,
                 test_metrics = config.test_metrics,
+                checkpoint_dir = config.checkpoint_dir,
+                n_jobs = config.n_jobs,
+                search_params = dict(config.search),
+                resampling_params = dict(config.resampling),
+                selection_params = dict(config.selection)
                 )
             
             logging.info("Paths have been assigned successfully to model and model metrics")
@@ -107,5 +131,160 @@ class ConfigurationManager:
         except Exception as e:
             raise CustomException(e, sys)
 
-    
-        
\ No newline at end of file
+    def get_model_benchmark_config(self) -> ModelBenchmarkConfig:
+        '''
+        This function gets model benchmark configuration, creates the directory of the benchmark results, and returns model benchmark configuration
+
+        Returns:
+            - model_benchmark_config: ModelBenchmarkConfig object
+        '''
+        try:
+            config = self.config.model_benchmark
+
+            create_directory([os.path.dirname(config.results_path)])
+
+            model_benchmark_config = ModelBenchmarkConfig(
+                results_path = config.results_path,
+                scales = list(config.scales),
+                test_size = config.test_size,
+                seed = config.seed,
+                n_jobs = config.n_jobs,
+                predict_repeats = config.predict_repeats,
+                max_train_rows = dict(config.max_train_rows or {}),
+                search_params = dict(config.search)
+            )
+
+            logging.info("Model benchmark configuration has been read successfully")
+
+            return model_benchmark_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_startup_benchmark_config(self) -> StartupBenchmarkConfig:
+        '''
+        This function gets startup benchmark configuration, creates the directory of the benchmark results, and returns startup benchmark configuration
+
+        Returns:
+            - startup_benchmark_config: StartupBenchmarkConfig object
+        '''
+        try:
+            config = self.config.startup_benchmark
+
+            create_directory([os.path.dirname(config.results_path)])
+
+            startup_benchmark_config = StartupBenchmarkConfig(
+                results_path = config.results_path,
+                repeats = config.repeats,
+                modules = list(config.modules),
+                training_modules = list(config.training_modules),
+                first_prediction = config.first_prediction
+            )
+
+            logging.info("Startup benchmark configuration has been read successfully")
+
+            return startup_benchmark_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_pipeline_config(self) -> PipelineConfig:
+        '''
+        This function gets the configuration for running the pipeline stages and handing data between them
+
+        Returns:
+            - pipeline_config: PipelineConfig object
+        '''
+        try:
+            config = self.config.pipeline
+
+            pipeline_config = PipelineConfig(
+                in_memory = config.in_memory,
+                async_writes = config.async_writes,
+                writer_threads = config.writer_threads,
+                max_parallel_stages = config.max_parallel_stages,
+                timings_path = config.timings_path
+            )
+
+            return pipeline_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_instrumentation_config(self) -> InstrumentationConfig:
+        '''
+        This function gets instrumentation configuration, the metrics and profiles directories are created when they are saved
+
+        Returns:
+            - instrumentation_config: InstrumentationConfig object
+        '''
+        try:
+            config = self.config.instrumentation
+
+            instrumentation_config = InstrumentationConfig(
+                enabled = config.enabled,
+                metrics_path = config.metrics_path,
+                profile_dir = config.profile_dir,
+                cprofile = config.cprofile,
+                tracemalloc = config.tracemalloc
+            )
+
+            return instrumentation_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_stage_cache_config(self) -> StageCacheConfig:
+        '''
+        This function gets stage cache configuration, creates root directory to store the stage manifests, and returns stage cache configuration
+
+        Returns:
+            - stage_cache_config: StageCacheConfig object
+        '''
+        try:
+            config = self.config.stage_cache
+
+            create_directory([config.root_dir])
+
+            stage_cache_config = StageCacheConfig(
+                root_dir = config.root_dir,
+                enabled = config.enabled
+            )
+
+            logging.info("Stage cache configuration has been assigned successfully")
+
+            return stage_cache_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_prediction_service_config(self) -> PredictionServiceConfig:
+        '''
+        This function gets prediction service configuration, assigns the address and batching settings of the service, and returns prediction service configuration
+
+        Returns:
+            - prediction_service_config: PredictionServiceConfig object
+        '''
+        try:
+            config = self.config.prediction_service
+
+            prediction_service_config = PredictionServiceConfig(
+                host = config.host,
+                port = config.port,
+                max_batch_size = config.max_batch_size,
+                max_wait_ms = config.max_wait_ms,
+                request_timeout = config.request_timeout,
+                workers = config.workers,
+                max_pending_requests = config.max_pending_requests,
+                shutdown_timeout = config.shutdown_timeout,
+                log_level = config.log_level,
+                queue_logging = config.queue_logging,
+                request_log_sample_rate = config.request_log_sample_rate
+            )
+
+            logging.info("Prediction service configuration has been assigned successfully")
+
+            return prediction_service_config
+
+        except Exception as e:
+            raise CustomException(e, sys)
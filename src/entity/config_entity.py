@@ -9,6 +9,17 @@ class DataIngestionConfig:
     raw_data_path: Path
     train_data_path: Path
     test_data_path: Path
+    source: str
+    sqlite_path: Path
+    table_name: str
+    columns: list
+    streaming: bool
+    chunksize: int
+    incremental: bool
+    watermark_path: Path
+    partitions_dir: Path
+    categorical_columns: list
+    float_columns: list
 
 @dataclass(frozen=True)
 class DataTransformationConfig:
@@ -16,8 +27,13 @@ class DataTransformationConfig:
     This class holds the configuration for data transformation
     '''
     preprocessor_obj_path: Path
+    compiled_preprocessor_obj_path: Path
     train_arr: Path
     test_arr: Path
+    train_target: Path
+    test_target: Path
+    sparse: bool
+    dtype: str
 
 @dataclass(frozen=True)
 class ModelTrainingConfig:
@@ -26,4 +42,81 @@ class ModelTrainingConfig:
     '''
     model_path: Path
     training_metrics: Path
-    test_metrics: Path
\ No newline at end of file
+    test_metrics: Path
+    checkpoint_dir: Path
+    n_jobs: int
+    search_params: dict
+    resampling_params: dict
+    selection_params: dict
+
+@dataclass(frozen=True)
+class ModelBenchmarkConfig:
+    '''
+    This class holds the configuration for benchmarking the candidate models
+    '''
+    results_path: Path
+    scales: list
+    test_size: float
+    seed: int
+    n_jobs: int
+    predict_repeats: int
+    max_train_rows: dict
+    search_params: dict
+
+@dataclass(frozen=True)
+class StartupBenchmarkConfig:
+    '''
+    This class holds the configuration for benchmarking the startup of the serving entry points
+    '''
+    results_path: Path
+    repeats: int
+    modules: list
+    training_modules: list
+    first_prediction: bool
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    '''
+    This class holds the configuration for running the pipeline stages and handing data between them
+    '''
+    in_memory: bool
+    async_writes: bool
+    writer_threads: int
+    max_parallel_stages: int
+    timings_path: Path
+
+@dataclass(frozen=True)
+class StageCacheConfig:
+    '''
+    This class holds the configuration for caching pipeline stages
+    '''
+    root_dir: Path
+    enabled: bool
+
+@dataclass(frozen=True)
+class InstrumentationConfig:
+    '''
+    This class holds the configuration for recording timers, counters and profiles
+    '''
+    enabled: bool
+    metrics_path: Path
+    profile_dir: Path
+    cprofile: bool
+    tracemalloc: bool
+
+@dataclass(frozen=True)
+class PredictionServiceConfig:
+    '''
+    This class holds the configuration for the HTTP prediction service
+    '''
+    host: str
+    port: int
+    max_batch_size: int
+    max_wait_ms: float
+    request_timeout: float
+    workers: int
+    max_pending_requests: int
+    shutdown_timeout: float
+    log_level: str
+    queue_logging: bool
+    request_log_sample_rate: float
@@ -1,6 +1,11 @@
 import logging
 import os
+import json
+import queue
+import atexit
+import random
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 # specify the log file name
 LOG_FILE = f'{datetime.now().strftime("%m_%d_%Y_%H_%M_%S")}.log'
@@ -17,4 +22,74 @@ logging.basicConfig(
     filename=LOG_FILE_PATH,
     format="[ %(asctime)s ] %(levelno)d %(name)s - %(levelname)s - %(message)s",
     level=logging.INFO
-)
\ No newline at end of file
+)
+
+# one structured record per prediction request, see log_request
+REQUEST_LOGGER = logging.getLogger('prediction.requests')
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    Filter keeping a random fraction of the records below WARNING, warnings and errors are always kept
+    '''
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.sample_rate
+
+
+class StructuredMessage:
+    '''
+    Message rendered as JSON only when a handler formats the record, so dropped records cost no serialization
+    '''
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __str__(self):
+        return json.dumps(self.fields, default=str)
+
+
+def log_request(level: int = logging.INFO, **fields):
+    '''
+    This function logs one structured record of a prediction request, subject to the level and sampling set by configure_logging
+
+    Args:
+        - level: Level of the record
+        - fields: Fields of the record, e.g. the number of rows and the latency of every phase
+    '''
+    if REQUEST_LOGGER.isEnabledFor(level):
+        REQUEST_LOGGER.log(level, '%s', StructuredMessage(**fields))
+
+
+def configure_logging(level: str = 'INFO', use_queue: bool = True, request_sample_rate: float = 1.0):
+    '''
+    This function sets the log level and request sampling of the process and, with use_queue, moves the file writes
+    of every handler to a background thread so that logging never blocks the caller on file I/O
+
+    Args:
+        - level: Minimum level of the records written
+        - use_queue: Whether records are handed to a QueueListener instead of being written by the calling thread
+        - request_sample_rate: Fraction of the request records of log_request that are written
+    '''
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    for existing_filter in [existing for existing in REQUEST_LOGGER.filters if isinstance(existing, SamplingFilter)]:
+        REQUEST_LOGGER.removeFilter(existing_filter)
+    REQUEST_LOGGER.addFilter(SamplingFilter(request_sample_rate))
+
+    handlers = [handler for handler in root.handlers if not isinstance(handler, QueueHandler)]
+    if not use_queue or not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # write the records still queued when the process exits
+    atexit.register(listener.stop)
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.instrumentation import instrumentation
+
+
+@dataclass(frozen=True)
+class Stage:
+    '''
+    This class declares one stage of a pipeline: the named values it consumes and produces, and the function computing them.
+    The function is called with the inputs as keyword arguments and returns the outputs in the declared order
+    '''
+    name: str
+    run: Callable
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+
+class PipelineRunner:
+    '''
+    Class to run the stages of a pipeline in dependency order, a stage starts as soon as the stages producing
+    its inputs have completed, so stages that do not depend on each other run at the same time
+    '''
+    def __init__(self, stages: list, max_parallel_stages: int = 2):
+        '''
+        Constructor for PipelineRunner class
+
+        Args:
+            - stages: Stage objects, in any order
+            - max_parallel_stages: Maximum number of stages running at the same time
+
+        Raises:
+            - ValueError: If two stages produce the same output, an input is never produced or the stages form a cycle
+        '''
+        self.stages = stages
+        self.max_parallel_stages = max_parallel_stages
+        self.timings = {}
+
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"{output} is produced by both {self.producers[output]} and {stage.name}")
+                self.producers[output] = stage.name
+
+        self.dependencies = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.producers]
+            if missing:
+                raise ValueError(f"Inputs {missing} of {stage.name} are not produced by any stage")
+            self.dependencies[stage.name] = {self.producers[name] for name in stage.inputs}
+
+        self.check_acyclic()
+
+    def check_acyclic(self):
+        '''
+        This function checks that every stage can run, i.e. that the dependencies do not form a cycle
+
+        Raises:
+            - ValueError: If the stages form a cycle
+        '''
+        completed = set()
+        pending = {stage.name for stage in self.stages}
+        while pending:
+            ready = {name for name in pending if self.dependencies[name] <= completed}
+            if not ready:
+                raise ValueError(f"Stages {sorted(pending)} depend on each other")
+            completed |= ready
+            pending -= ready
+
+    def run_stage(self, stage: Stage, values: dict) -> dict:
+        '''
+        This function runs one stage and times it
+
+        Args:
+            - stage: Stage to run
+            - values: Values produced by the completed stages
+
+        Returns:
+            - dict: Outputs of the stage by name
+        '''
+        logging.info(f"Starting {stage.name} Pipeline")
+        start = time.perf_counter()
+
+        with instrumentation.profile(f"stage.{stage.name}"):
+            result = stage.run(**{name: values[name] for name in stage.inputs})
+
+        self.timings[stage.name] = {
+            'seconds': time.perf_counter() - start,
+            'started_at': start
+        }
+        logging.info(f"Completed {stage.name} Pipeline in {self.timings[stage.name]['seconds']:.2f}s")
+
+        if not stage.outputs:
+            return {}
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        return dict(zip(stage.outputs, result))
+
+    def run(self) -> dict:
+        '''
+        This function runs every stage once its inputs are available
+
+        Returns:
+            - values: Outputs of every stage by name
+
+        Raises:
+            - CustomException: If any stage fails, the stages already running are completed and no new stage is started
+        '''
+        try:
+            values = {}
+            completed = set()
+            pending = list(self.stages)
+            running = {}
+            pipeline_start = time.perf_counter()
+
+            with ThreadPoolExecutor(max_workers=self.max_parallel_stages, thread_name_prefix='stage') as executor:
+                while pending or running:
+                    for stage in [stage for stage in pending if self.dependencies[stage.name] <= completed]:
+                        pending.remove(stage)
+                        running[executor.submit(self.run_stage, stage, values)] = stage
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        # raises the error of a failed stage, leaving the remaining stages pending
+                        values.update(future.result())
+                        completed.add(stage.name)
+
+            for timing in self.timings.values():
+                timing['started_at'] -= pipeline_start
+            logging.info(f"Pipeline completed in {time.perf_counter() - pipeline_start:.2f}s, stage timings: "
+                         f"{ {name: round(timing['seconds'], 2) for name, timing in self.timings.items()} }")
+
+            return values
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_timings(self, path: str):
+        '''
+        This function saves the duration and start offset in seconds of every stage that ran to a JSON file
+
+        Args:
+            - path: Path of the JSON file
+        '''
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w') as file:
+                json.dump(self.timings, file, indent=4)
+            logging.info(f"Stage timings have been saved at {path}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
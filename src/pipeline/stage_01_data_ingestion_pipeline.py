@@ -1,16 +1,31 @@
+import os
 import sys
+import pandas as pd
 from src.logger import logging
 from src.exception import CustomException
 from src.config.configuration import ConfigurationManager
 from src.components.data_ingestion import DataIngestion
+from src.utils.stage_cache import StageCache, get_code_files
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.common import read_dataframe
 import warnings
 warnings.filterwarnings("ignore")
 
+STAGE_NAME = "Data Ingestion"
+
+
 class DataIngestionPipeline:
     '''
     This class is responsible for initiating the Data Ingestion Pipeline
     '''
-    def __init__(self):
+    def __init__(self, artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for DataIngestionPipeline class
+
+        Args:
+            - artifact_writer : ArtifactWriter : writer persisting the stage outputs, writes are synchronous by default
+        '''
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
         logging.info("Data Ingestion Pipeline initiated")
 
     def main(self):
@@ -18,8 +33,8 @@ class DataIngestionPipeline:
         This function initiates the Data Ingestion Pipeline
 
         Returns:
-            - training_data: Training data
-            - testing_data: Testing data
+            - training_data: Path to the training data, or the training dataframe in in-memory mode
+            - testing_data: Path to the testing data, or the testing dataframe in in-memory mode
 
         Raises:
             - CustomException: If any error occurs while initiating the Data Ingestion Pipeline
@@ -27,8 +42,31 @@ class DataIngestionPipeline:
         try:
             config_manager = ConfigurationManager()
             data_ingestion_config = config_manager.get_data_ingestion_config()
-            data_ingestion = DataIngestion(data_ingestion_config)
-            training_data, testing_data = data_ingestion.initiate_data_ingestion()
+            data_ingestion = DataIngestion(data_ingestion_config, self.artifact_writer)
+            in_memory = config_manager.get_pipeline_config().in_memory
+
+            stage_cache = StageCache(config_manager.get_stage_cache_config())
+            cache_key = stage_cache.compute_key(
+                config_section = config_manager.config.data_ingestion,
+                inputs = [data_ingestion.get_source_fingerprint()],
+                code_files = get_code_files(DataIngestion)
+            )
+
+            cached_outputs = stage_cache.load(STAGE_NAME, cache_key)
+            if cached_outputs is not None:
+                training_data, testing_data = cached_outputs
+                if in_memory and not os.path.isdir(training_data):
+                    return read_dataframe(training_data), read_dataframe(testing_data)
+                return training_data, testing_data
+
+            training_data, testing_data = data_ingestion.initiate_data_ingestion(in_memory=in_memory)
+
+            outputs = [training_data, testing_data]
+            if isinstance(training_data, pd.DataFrame):
+                outputs = [data_ingestion_config.train_data_path, data_ingestion_config.test_data_path]
+
+            # written only once the outputs have been written successfully, so the manifest never records a missing file
+            self.artifact_writer.submit_when_written(stage_cache.save, STAGE_NAME, cache_key, outputs=outputs)
 
             return training_data, testing_data
         except Exception as e:
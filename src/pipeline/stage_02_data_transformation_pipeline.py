@@ -2,18 +2,32 @@ import sys
 from src.logger import logging
 from src.exception import CustomException
 from src.config.configuration import ConfigurationManager
-from src.pipeline.stage_01_data_ingestion_pipeline import DataIngestionPipeline
 from src.components.data_transformation import DataTransformation
+from src.utils.stage_cache import StageCache, get_code_files
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.common import load_transformed_data
 import warnings
 warnings.filterwarnings("ignore")
 
-class DataTransformationPipeline(DataIngestionPipeline):
+STAGE_NAME = "Data Transformation"
+
+
+class DataTransformationPipeline:
     '''
     This class is responsible for initiating the Data Transformation Pipeline
     '''
-    def __init__(self, training_data, testing_data):
+    def __init__(self, training_data, testing_data, artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for DataTransformationPipeline class
+
+        Args:
+            - training_data : Path to the training data, or the training dataframe
+            - testing_data : Path to the testing data, or the testing dataframe
+            - artifact_writer : ArtifactWriter : writer persisting the stage outputs, writes are synchronous by default
+        '''
         self.training_data = training_data
         self.testing_data = testing_data
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
 
         logging.info("Data Transformation Pipeline initiated")
 
@@ -22,8 +36,10 @@ class DataTransformationPipeline(DataIngestionPipeline):
         This function initiates the Data Transformation Pipeline
         
         Returns:
-            - train_arr: Transformed training data
-            - test_arr: Transformed testing data
+            - train_arr: Transformed training features
+            - train_target: Target of the training data
+            - test_arr: Transformed testing features
+            - test_target: Target of the testing data
             
         Raises:
             - CustomException: If any error occurs while initiating the Data Transformation Pipeline
@@ -31,10 +47,32 @@ class DataTransformationPipeline(DataIngestionPipeline):
         try:
             config = ConfigurationManager()
             data_transformation_config = config.get_data_transformation_config()
-            data_transformation = DataTransformation(data_transformation_config)
-            train_arr, test_arr, _ = data_transformation.initiate_data_transformation(training_data=self.training_data, testing_data=self.testing_data)
+            data_transformation = DataTransformation(data_transformation_config, self.artifact_writer)
+
+            stage_cache = StageCache(config.get_stage_cache_config())
+            cache_key = stage_cache.compute_key(
+                config_section = config.config.data_transformation,
+                inputs = [self.training_data, self.testing_data],
+                code_files = get_code_files(DataTransformation)
+            )
+
+            cached_outputs = stage_cache.load(STAGE_NAME, cache_key)
+            if cached_outputs is not None:
+                return tuple(load_transformed_data(path) for path in cached_outputs[2:])
+
+            train_arr, train_target, test_arr, test_target, preprocessor_obj_path = data_transformation.initiate_data_transformation(training_data=self.training_data, testing_data=self.testing_data)
+
+            # written only once the outputs have been written successfully, so the manifest never records a missing file
+            self.artifact_writer.submit_when_written(stage_cache.save, STAGE_NAME, cache_key, outputs=[
+                preprocessor_obj_path,
+                data_transformation_config.compiled_preprocessor_obj_path,
+                data_transformation_config.train_arr,
+                data_transformation_config.train_target,
+                data_transformation_config.test_arr,
+                data_transformation_config.test_target
+            ])
 
-            return train_arr, test_arr
+            return train_arr, train_target, test_arr, test_target
             
         except Exception as e:
             raise CustomException(e, sys)
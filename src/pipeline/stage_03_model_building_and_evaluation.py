@@ -3,18 +3,35 @@ from src.logger import logging
 from src.exception import CustomException
 from src.config.configuration import ConfigurationManager
 from src.components.model_building_and_evaluation import ModelBuilding
-from src.pipeline.stage_02_data_transformation_pipeline import DataTransformationPipeline
+from src.utils.stage_cache import StageCache, get_code_files
+from src.utils.artifact_writer import ArtifactWriter
 import warnings
 warnings.filterwarnings("ignore")
 
 
+STAGE_NAME = "Model Building"
+
+
 class ModelBuildingPipeline:
     '''
     This class is responsible for initiating the Model Building Pipeline
     '''
-    def __init__(self, train_array, test_arr):
+    def __init__(self, train_array, train_target, test_arr, test_target, artifact_writer: ArtifactWriter = None):
+        '''
+        Constructor for ModelBuildingPipeline class
+
+        Args:
+            - train_array : Transformed training features
+            - train_target : Target of the training data
+            - test_arr : Transformed testing features
+            - test_target : Target of the testing data
+            - artifact_writer : ArtifactWriter : writer persisting the stage outputs, writes are synchronous by default
+        '''
         self.train_array = train_array
+        self.train_target = train_target
         self.test_arr = test_arr
+        self.test_target = test_target
+        self.artifact_writer = artifact_writer or ArtifactWriter(asynchronous=False)
         logging.info("Model Building Pipeline initiated")
 
     def main(self):
@@ -27,8 +44,27 @@ class ModelBuildingPipeline:
         try:
             config = ConfigurationManager()
             model_training_config = config.get_model_config()
-            model_building = ModelBuilding(model_training_config)
-            model_building.initiate_model_building(train_arr=self.train_array, test_arr=self.test_arr)
+            model_building = ModelBuilding(model_training_config, self.artifact_writer)
+
+            stage_cache = StageCache(config.get_stage_cache_config())
+            cache_key = stage_cache.compute_key(
+                config_section = config.config.model_training,
+                inputs = [self.train_array, self.train_target, self.test_arr, self.test_target],
+                code_files = get_code_files(ModelBuilding)
+            )
+
+            if stage_cache.load(STAGE_NAME, cache_key) is not None:
+                return
+
+            model_building.initiate_model_building(train_arr=self.train_array, train_target=self.train_target,
+                                                   test_arr=self.test_arr, test_target=self.test_target)
+
+            # written only once the outputs have been written successfully, so the manifest never records a missing file
+            self.artifact_writer.submit_when_written(stage_cache.save, STAGE_NAME, cache_key, outputs=[
+                model_training_config.model_path,
+                model_training_config.training_metrics,
+                model_training_config.test_metrics
+            ])
 
         except Exception as e:
             raise CustomException(e, sys)
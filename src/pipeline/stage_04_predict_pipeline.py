@@ -1,11 +1,28 @@
+import os
+import time
+import numpy as np
 import pandas as pd
-from src.utils.common import load_object
+from src.utils.object_cache import load_cached_object
+from src.components.label_encoding import AdmissionLabelEncoder
+from src.components.feature_encoding import normalize_features
+from src.utils.instrumentation import instrumentation
 import sys
-from src.logger import logging
+from src.logger import logging, log_request
 from src.exception import CustomException
 import warnings 
 warnings.filterwarnings('ignore')
 
+PREPROCESSOR_PATH = 'artifacts/data_transformation/preprocessor.joblib'
+COMPILED_PREPROCESSOR_PATH = 'artifacts/data_transformation/compiled_preprocessor.pkl'
+MODEL_PATH = 'artifacts/model_training/model.pkl'
+
+# input features expected by the preprocessor, in the order used by CustomData
+FEATURE_COLUMNS = ['gender', 'international', 'gpa', 'major', 'race', 'gmat', 'work_exp', 'work_industry']
+NUMERICAL_COLUMNS = ['gpa', 'gmat', 'work_exp']
+
+# numerical encoding of the target used during data transformation
+TARGET_LABELS = AdmissionLabelEncoder().labels
+
 
 class CustomData:
     '''
@@ -22,7 +39,7 @@ class CustomData:
                  work_exp: float,
                  work_industry: str):
         try:
-            logging.info('Initializing CustomData object')
+            logging.debug('Initializing CustomData object')
         
             self.gender = gender
 
@@ -40,7 +57,7 @@ class CustomData:
 
             self.work_industry = work_industry
 
-            logging.info('Successfully initialized CustomData object')
+            logging.debug('Successfully initialized CustomData object')
 
         except Exception as e:
             raise CustomException(str(e))
@@ -57,7 +74,7 @@ class CustomData:
             - CustomException : if any error occurs while converting the input data to dataframe
         '''
         try:
-            logging.info('Converting input data to dataframe')
+            logging.debug('Converting input data to dataframe')
             data = {
                 "gender" : [self.gender],
                 "international" : [self.international],
@@ -71,26 +88,121 @@ class CustomData:
 
             df = pd.DataFrame(data)
 
-            logging.info('Successfully converted input data to dataframe')
+            logging.debug('Successfully converted input data to dataframe')
 
             return df
         except Exception as e:
             raise CustomException(str(e))
 
+    def get_data_as_dict(self) -> dict:
+        '''
+        This function returns the input data as a dictionary, which the compiled preprocessor transforms without building a dataframe
+
+        Returns:
+            - dict : dictionary from feature name to value
+        '''
+        return {column: getattr(self, column) for column in FEATURE_COLUMNS}
+
 
 class PredictionPipeline:
     '''
     This class is used to predict the target using the input features
     '''
-    def __init__(self) -> None:
-        pass
+    def __init__(self,
+                 preprocessor_path: str = PREPROCESSOR_PATH,
+                 model_path: str = MODEL_PATH,
+                 compiled_preprocessor_path: str = None) -> None:
+        '''
+        Constructor for PredictionPipeline class
+
+        Args:
+            - preprocessor_path : str : path to the saved preprocessor object
+            - model_path : str : path to the saved model object
+            - compiled_preprocessor_path : str : path to the saved compiled preprocessor, used instead of the preprocessor when it exists,
+              defaults to the compiled file of training when preprocessor_path is the default and to none otherwise
+        '''
+        if compiled_preprocessor_path is None:
+            # the compiled file of training is compiled from the default preprocessor, an explicit preprocessor is used as given
+            compiled_preprocessor_path = COMPILED_PREPROCESSOR_PATH if preprocessor_path == PREPROCESSOR_PATH else ''
+
+        self.preprocessor_path = preprocessor_path
+        self.model_path = model_path
+        self.compiled_preprocessor_path = compiled_preprocessor_path
+
+    def load_artifacts(self):
+        '''
+        This function loads the preprocessor and model used for prediction
+
+        Returns:
+            - preprocessor : compiled preprocessor if available, otherwise the fitted preprocessor object
+            - model : fitted model object
+
+        Raises:
+            - CustomException : if any error occurs while loading the preprocessor or model
+        '''
+        try:
+            # the objects are unpickled once per process and reloaded only when the files change
+            if self.compiled_preprocessor_path and os.path.exists(self.compiled_preprocessor_path):
+                preprocessor = load_cached_object(self.compiled_preprocessor_path)
+            else:
+                preprocessor = load_cached_object(self.preprocessor_path)
+            model = load_cached_object(self.model_path)
+
+            logging.debug('Successfully loaded preprocessor and model for prediction')
+
+            return preprocessor, model
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def transform_features(self, preprocessor, features):
+        '''
+        This function transforms the input features with the loaded preprocessor, after converting the boolean features
+        into the categories used in training, every prediction entry point goes through it
+
+        Args:
+            - preprocessor : compiled or fitted preprocessor returned by load_artifacts
+            - features : input features as a dataframe, or as a dictionary for a single applicant
+
+        Returns:
+            - np.ndarray : transformed features
+        '''
+        features = normalize_features(features)
+
+        if isinstance(features, dict):
+            if hasattr(preprocessor, 'transform_record'):
+                return preprocessor.transform_record(features)
+            return preprocessor.transform(pd.DataFrame([features]))
+
+        return preprocessor.transform(features)
+
+    def record_request(self, method: str, rows: int, start: float, loaded: float, transformed: float, predicted: float):
+        '''
+        This function records the phases of one prediction call in the instrumentation timers and as a single structured log record
+
+        Args:
+            - method : str : name of the prediction method
+            - rows : int : number of applicants scored
+            - start, loaded, transformed, predicted : float : perf_counter readings at the start and after every phase
+        '''
+        instrumentation.record_time('predict.load', loaded - start)
+        instrumentation.record_time('predict.transform', transformed - loaded)
+        instrumentation.record_time('predict.predict', predicted - transformed)
+        instrumentation.increment('predict.rows', rows)
+
+        log_request(
+            event = method,
+            rows = rows,
+            load_ms = round((loaded - start) * 1000, 3),
+            transform_ms = round((transformed - loaded) * 1000, 3),
+            predict_ms = round((predicted - transformed) * 1000, 3)
+        )
 
     def predict(self, features):
         '''
         This function predicts the target using the input features
 
         Args:
-            - features : input features
+            - features : input features as a dataframe, or as a dictionary for a single applicant
 
         Returns:
             - prediction : predicted target
@@ -99,20 +211,75 @@ class PredictionPipeline:
             - CustomException : if any error occurs while predicting the target
         '''
         try:
-            logging.info('Prediction pipeline started')
-
-            preprocessor = load_object('artifacts/data_transformation/preprocessor.joblib')
-            model = load_object('artifacts/model_training/model.pkl')
+            start = time.perf_counter()
+            preprocessor, model = self.load_artifacts()
+            loaded = time.perf_counter()
 
-            logging.info('Successfully loaded preprocessor and model for prediction')
-
-            scaled_features = preprocessor.transform(features)
-            logging.info('Successfully transformed input features')
+            scaled_features = self.transform_features(preprocessor, features)
+            transformed = time.perf_counter()
 
             prediction = model.predict(scaled_features)
-            logging.info('Successfully predicted the target')
+
+            self.record_request('predict', scaled_features.shape[0], start, loaded, transformed, time.perf_counter())
 
             return prediction
         except Exception as e:
             raise CustomException(e, sys)
-    
\ No newline at end of file
+
+    def score(self, model, scaled_features):
+        '''
+        This function computes the class probabilities of transformed features and derives the most probable class from them,
+        so every applicant goes through the model once
+
+        Args:
+            - model : fitted model object
+            - scaled_features : np.ndarray : transformed features
+
+        Returns:
+            - prediction : np.ndarray : most probable class of every applicant
+            - probabilities : np.ndarray : probability of every class, one column per TARGET_LABELS key in key order
+        '''
+        probabilities = np.zeros((scaled_features.shape[0], len(TARGET_LABELS)))
+        class_columns = [int(label) for label in model.classes_]
+
+        if hasattr(model, 'predict_proba'):
+            probabilities[:, class_columns] = model.predict_proba(scaled_features)
+        else:
+            # models trained without probability estimates only give their decision
+            logging.warning(f'{type(model).__name__} does not support predict_proba, returning one-hot probabilities')
+            predicted_classes = model.predict(scaled_features).astype(int)
+            probabilities[np.arange(len(predicted_classes)), predicted_classes] = 1.0
+
+        prediction = np.array(sorted(TARGET_LABELS))[np.argmax(probabilities, axis=1)]
+
+        return prediction, probabilities
+
+    def predict_proba(self, features):
+        '''
+        This function predicts the class probabilities and the most probable class of every applicant from a single forward pass of the model
+
+        Args:
+            - features : input features as a dataframe, or as a dictionary for a single applicant
+
+        Returns:
+            - prediction : np.ndarray : most probable class of every applicant
+            - probabilities : np.ndarray : probability of every class, one column per TARGET_LABELS key in key order
+
+        Raises:
+            - CustomException : if any error occurs while predicting the probabilities
+        '''
+        try:
+            start = time.perf_counter()
+            preprocessor, model = self.load_artifacts()
+            loaded = time.perf_counter()
+
+            scaled_features = self.transform_features(preprocessor, features)
+            transformed = time.perf_counter()
+
+            prediction, probabilities = self.score(model, scaled_features)
+
+            self.record_request('predict_proba', scaled_features.shape[0], start, loaded, transformed, time.perf_counter())
+
+            return prediction, probabilities
+        except Exception as e:
+            raise CustomException(e, sys)
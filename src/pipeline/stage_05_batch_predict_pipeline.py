@@ -0,0 +1,164 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from src.logger import logging, configure_logging
+from src.exception import CustomException
+from src.utils.common import ChunkedDataFrameWriter
+from src.utils.instrumentation import instrumentation
+from src.config.configuration import ConfigurationManager
+from src.pipeline.stage_04_predict_pipeline import (PredictionPipeline,
+                                                    FEATURE_COLUMNS,
+                                                    NUMERICAL_COLUMNS,
+                                                    TARGET_LABELS,
+                                                    PREPROCESSOR_PATH,
+                                                    MODEL_PATH)
+import warnings
+warnings.filterwarnings('ignore')
+
+# columns copied from the input to the output so that predictions can be joined back
+PASSTHROUGH_COLUMNS = ['application_id']
+
+
+class BatchPredictionPipeline:
+    '''
+    This class is used to score a CSV or Parquet file of applicants in fixed size chunks
+    '''
+    def __init__(self,
+                 input_path: str,
+                 output_path: str,
+                 chunksize: int = 50000,
+                 preprocessor_path: str = PREPROCESSOR_PATH,
+                 model_path: str = MODEL_PATH) -> None:
+        '''
+        Constructor for BatchPredictionPipeline class
+
+        Args:
+            - input_path : str : path to the CSV or Parquet file to be scored
+            - output_path : str : path to the CSV or Parquet file to write the predictions to
+            - chunksize : int : number of rows read, scored and written at a time
+            - preprocessor_path : str : path to the saved preprocessor object
+            - model_path : str : path to the saved model object
+        '''
+        self.input_path = input_path
+        self.output_path = output_path
+        self.chunksize = chunksize
+        self.prediction_pipeline = PredictionPipeline(preprocessor_path=preprocessor_path, model_path=model_path)
+
+    def read_in_chunks(self):
+        '''
+        This function reads the input file lazily, one chunk at a time
+
+        Yields:
+            - pd.DataFrame : chunk of the input file
+
+        Raises:
+            - CustomException : if the file format is not supported or the file cannot be read
+        '''
+        try:
+            extension = os.path.splitext(self.input_path)[1].lower()
+
+            if extension == '.csv':
+                # categorical and boolean features are kept as the strings used in training, as they come from parquet
+                dtype = {column: str for column in FEATURE_COLUMNS if column not in NUMERICAL_COLUMNS}
+                yield from pd.read_csv(self.input_path, chunksize=self.chunksize, dtype=dtype)
+
+            elif extension == '.parquet':
+                import pyarrow.parquet as pq
+
+                parquet_file = pq.ParquetFile(self.input_path)
+                for batch in parquet_file.iter_batches(batch_size=self.chunksize):
+                    yield batch.to_pandas()
+
+            else:
+                raise ValueError(f"Unsupported input file format: {extension}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def score_chunk(self, chunk: pd.DataFrame, preprocessor, model) -> pd.DataFrame:
+        '''
+        This function scores a single chunk of applicants
+
+        Args:
+            - chunk : pd.DataFrame : chunk of the input file
+            - preprocessor : fitted preprocessor object
+            - model : fitted model object
+
+        Returns:
+            - pd.DataFrame : passthrough columns, predicted class and class probabilities
+        '''
+        features = chunk[FEATURE_COLUMNS]
+        # parquet stores missing strings as None, which the imputers do not treat as missing
+        with instrumentation.timer('batch_predict.transform'):
+            features = self.prediction_pipeline.transform_features(preprocessor, features.where(features.notna(), np.nan))
+
+        with instrumentation.timer('batch_predict.predict'):
+            prediction, probabilities = self.prediction_pipeline.score(model, features)
+        instrumentation.increment('batch_predict.rows', len(chunk))
+
+        scored = chunk[[column for column in PASSTHROUGH_COLUMNS if column in chunk.columns]].copy()
+        scored['prediction'] = prediction.astype(np.int64)
+        scored['prediction_label'] = scored['prediction'].map(TARGET_LABELS)
+
+        for index, label in enumerate(sorted(TARGET_LABELS)):
+            scored[f'probability_{TARGET_LABELS[label].lower()}'] = probabilities[:, index]
+
+        return scored
+
+    def main(self) -> int:
+        '''
+        This function scores the input file chunk by chunk and appends each scored chunk to the output file,
+        so memory stays bounded by the chunk size rather than the size of the file
+
+        Returns:
+            - int : number of rows scored
+
+        Raises:
+            - CustomException : if any error occurs while scoring the file
+        '''
+        try:
+            logging.info(f'Batch prediction started for {self.input_path}')
+
+            # load once so a model replaced mid-run does not mix predictions from two models
+            with instrumentation.timer('batch_predict.load'):
+                preprocessor, model = self.prediction_pipeline.load_artifacts()
+
+            output_directory = os.path.dirname(self.output_path)
+            if output_directory:
+                os.makedirs(output_directory, exist_ok=True)
+
+            with ChunkedDataFrameWriter(self.output_path) as writer:
+                for chunk_number, chunk in enumerate(self.read_in_chunks()):
+                    writer.write(self.score_chunk(chunk, preprocessor, model))
+                    logging.info(f'Scored chunk {chunk_number} ({writer.rows_written} rows so far)')
+
+            logging.info(f'Batch prediction completed, {writer.rows_written} rows written to {self.output_path}')
+
+            return writer.rows_written
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a CSV or Parquet file of MBA applicants')
+    parser.add_argument('input_path', help='CSV or Parquet file with the applicant features')
+    parser.add_argument('output_path', help='CSV or Parquet file to write the predictions to')
+    parser.add_argument('--chunksize', type=int, default=50000, help='number of rows scored at a time')
+    parser.add_argument('--preprocessor-path', default=PREPROCESSOR_PATH, help='path to the saved preprocessor')
+    parser.add_argument('--model-path', default=MODEL_PATH, help='path to the saved model')
+    args = parser.parse_args()
+
+    config_manager = ConfigurationManager()
+    service_config = config_manager.get_prediction_service_config()
+    configure_logging(service_config.log_level, service_config.queue_logging, service_config.request_log_sample_rate)
+    instrumentation.configure(config_manager.get_instrumentation_config())
+
+    BatchPredictionPipeline(
+        input_path=args.input_path,
+        output_path=args.output_path,
+        chunksize=args.chunksize,
+        preprocessor_path=args.preprocessor_path,
+        model_path=args.model_path
+    ).main()
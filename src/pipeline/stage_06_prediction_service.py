@@ -0,0 +1,363 @@
+import sys
+import json
+import math
+import queue
+import threading
+import time
+import pandas as pd
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.logger import logging, log_request, configure_logging
+from src.exception import CustomException
+from src.config.configuration import ConfigurationManager
+from src.utils.instrumentation import instrumentation
+from src.components.feature_encoding import BOOLEAN_FEATURES, BOOLEAN_CATEGORIES, normalize_boolean
+from src.entity.config_entity import PredictionServiceConfig
+from src.pipeline.stage_04_predict_pipeline import (CustomData,
+                                                    PredictionPipeline,
+                                                    FEATURE_COLUMNS,
+                                                    TARGET_LABELS)
+import warnings
+warnings.filterwarnings('ignore')
+
+
+# fields of CustomData that are not free text, a bad value is rejected before it reaches a shared batch
+NUMERICAL_FIELDS = ['gpa', 'gmat', 'work_exp']
+BOOLEAN_FIELDS = BOOLEAN_FEATURES
+
+
+def coerce_value(column: str, value, index: int):
+    '''
+    This function converts the value of one field to the type the preprocessor expects, null is kept as a missing value
+
+    Args:
+        - column : name of the field
+        - value : value of the field in the JSON payload
+        - index : position of the instance in the payload, used in the error message
+
+    Returns:
+        - float for the numerical fields, 'True' or 'False' for the boolean fields and str for the categorical fields, or None
+
+    Raises:
+        - ValueError : if the value cannot be converted
+    '''
+    if value is None:
+        return None
+
+    if column in NUMERICAL_FIELDS:
+        # booleans are ints in Python, but never a valid score
+        if not isinstance(value, bool):
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                number = None
+            if number is not None and math.isfinite(number):
+                return number
+        raise ValueError(f"Instance {index} field {column} must be a finite number, got {value!r}")
+
+    if column in BOOLEAN_FIELDS:
+        # the categories used in training, the same conversion as every other prediction entry point
+        if not isinstance(value, float):
+            category = normalize_boolean(value)
+            if category in BOOLEAN_CATEGORIES.values():
+                return category
+        raise ValueError(f"Instance {index} field {column} must be a boolean, got {value!r}")
+
+    if not isinstance(value, str):
+        raise ValueError(f"Instance {index} field {column} must be a string, got {value!r}")
+    return value
+
+
+def parse_payload(payload):
+    '''
+    This function validates a prediction request against the CustomData fields
+
+    Args:
+        - payload : a single applicant as an object, or several applicants as a list or as {"instances": [...]}
+
+    Returns:
+        - records : list of dictionaries from feature name to value
+        - is_batch : False if the payload was a single applicant
+
+    Raises:
+        - ValueError : if the payload is empty, does not match the CustomData fields or a value has the wrong type
+    '''
+    if isinstance(payload, dict) and 'instances' in payload:
+        payload = payload['instances']
+
+    is_batch = isinstance(payload, list)
+    instances = payload if is_batch else [payload]
+    if not instances:
+        raise ValueError("The payload contains no applicants")
+
+    records = []
+    for index, instance in enumerate(instances):
+        if not isinstance(instance, dict):
+            raise ValueError(f"Instance {index} must be a JSON object")
+
+        missing = [column for column in FEATURE_COLUMNS if column not in instance]
+        unknown = [column for column in instance if column not in FEATURE_COLUMNS]
+        if missing or unknown:
+            raise ValueError(f"Instance {index} has missing fields {missing} and unknown fields {unknown}")
+
+        values = {column: coerce_value(column, instance[column], index) for column in FEATURE_COLUMNS}
+        records.append(CustomData(**values).get_data_as_dict())
+
+    return records, is_batch
+
+
+def format_prediction(prediction, probabilities=None) -> dict:
+    '''
+    This function converts a predicted class, and optionally its class probabilities ordered by TARGET_LABELS key, into its JSON representation
+    '''
+    prediction = int(prediction)
+    response = {'prediction': prediction, 'label': TARGET_LABELS.get(prediction)}
+    if probabilities is not None:
+        response['probabilities'] = {
+            TARGET_LABELS[label]: float(probability) for label, probability in zip(sorted(TARGET_LABELS), probabilities)
+        }
+    return response
+
+
+class MicroBatcher:
+    '''
+    This class combines the applicants of concurrent requests into one vectorized prediction.
+    A batch is scored when it reaches max_batch_size applicants or max_wait_ms after its first request arrived
+    '''
+    def __init__(self, prediction_pipeline: PredictionPipeline, max_batch_size: int = 256, max_wait_ms: float = 5):
+        '''
+        Constructor for MicroBatcher class
+
+        Args:
+            - prediction_pipeline : PredictionPipeline : pipeline used to score the batches
+            - max_batch_size : int : maximum number of applicants scored together
+            - max_wait_ms : float : maximum time the first request of a batch waits for more requests
+        '''
+        self.prediction_pipeline = prediction_pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self.run, name='micro-batcher', daemon=True)
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.requests.put(None)
+        self.worker.join()
+
+    def submit(self, records: list) -> Future:
+        '''
+        This function queues the applicants of one request
+
+        Args:
+            - records : list : dictionaries from feature name to value
+
+        Returns:
+            - Future : resolves to the predictions and the class probabilities of the records
+        '''
+        future = Future()
+        self.requests.put((records, future))
+        return future
+
+    def collect_batch(self, first_request):
+        '''
+        This function gathers the requests queued within max_wait of the first one, up to max_batch_size applicants
+        '''
+        batch = [first_request]
+        batch_size = len(first_request[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while batch_size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self.stopped.set()
+                break
+            batch.append(request)
+            batch_size += len(request[0])
+
+        return batch
+
+    def run(self):
+        '''
+        This function scores batches until the batcher is stopped
+        '''
+        while not self.stopped.is_set():
+            first_request = self.requests.get()
+            if first_request is None:
+                break
+
+            batch = self.collect_batch(first_request)
+            records = [record for request_records, _ in batch for record in request_records]
+
+            try:
+                predictions, probabilities = self.score(records)
+                instrumentation.increment('service.batches')
+                instrumentation.increment('service.requests', len(batch))
+
+                start = 0
+                for request_records, future in batch:
+                    end = start + len(request_records)
+                    future.set_result((predictions[start:end], probabilities[start:end]))
+                    start += len(request_records)
+
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+
+                # one bad request must not fail the requests batched with it, so each is scored on its own
+                logging.warning(f'Batch of {len(batch)} requests failed ({e}), scoring the requests one at a time')
+                for request_records, future in batch:
+                    try:
+                        future.set_result(self.score(request_records))
+                    except Exception as request_error:
+                        future.set_exception(request_error)
+
+    def score(self, records: list):
+        '''
+        This function scores the applicants of one or several requests in one vectorized call
+
+        Args:
+            - records : list : dictionaries from feature name to value
+
+        Returns:
+            - predictions : np.ndarray : most probable class of every applicant
+            - probabilities : np.ndarray : probability of every class of every applicant
+        '''
+        features = pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+        return self.prediction_pipeline.predict_proba(features)
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    '''
+    This class handles the HTTP requests of the prediction service:
+    GET /health and POST /predict with a JSON payload accepted by parse_payload
+    '''
+    batcher: MicroBatcher = None
+    request_timeout: float = 10
+
+    def send_json(self, status: int, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        start = time.perf_counter()
+        status, rows = self.handle_predict()
+        log_request(logging.INFO if status == 200 else logging.WARNING,
+                    event='http_predict', status=status, rows=rows, latency_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    def handle_predict(self):
+        '''
+        This function answers one prediction request
+
+        Returns:
+            - status : int : HTTP status of the response
+            - rows : int : number of applicants in the request
+        '''
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            records, is_batch = parse_payload(json.loads(self.rfile.read(length)))
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return 400, 0
+
+        try:
+            predictions, probabilities = self.batcher.submit(records).result(timeout=self.request_timeout)
+        except Exception as e:
+            logging.error(f'Prediction failed: {e}')
+            self.send_json(500, {'error': 'Prediction failed'})
+            return 500, len(records)
+
+        if is_batch:
+            self.send_json(200, {'predictions': [format_prediction(*scored) for scored in zip(predictions, probabilities)]})
+        else:
+            self.send_json(200, format_prediction(predictions[0], probabilities[0]))
+        return 200, len(records)
+
+    def log_message(self, format, *args):
+        # route the access log to the project log file instead of stderr
+        logging.debug(format % args)
+
+
+class PredictionService:
+    '''
+    This class runs the HTTP/JSON prediction service around PredictionPipeline
+    '''
+    def __init__(self, config: PredictionServiceConfig, prediction_pipeline: PredictionPipeline = None):
+        self.config = config
+        self.prediction_pipeline = prediction_pipeline or PredictionPipeline()
+        self.batcher = MicroBatcher(self.prediction_pipeline, config.max_batch_size, config.max_wait_ms)
+        self.server = None
+
+    def create_server(self) -> ThreadingHTTPServer:
+        '''
+        This function binds the HTTP server and starts the micro-batcher
+
+        Returns:
+            - ThreadingHTTPServer : server handling each request on its own thread
+
+        Raises:
+            - CustomException : if the server cannot be started
+        '''
+        try:
+            # load the model before accepting requests so the first request does not pay for it
+            self.prediction_pipeline.load_artifacts()
+            self.batcher.start()
+
+            handler = type('Handler', (PredictionRequestHandler,), {
+                'batcher': self.batcher,
+                'request_timeout': self.config.request_timeout
+            })
+            # a deep accept backlog so bursts of concurrent clients queue up instead of being reset
+            server_class = type('Server', (ThreadingHTTPServer,), {'request_queue_size': 1024, 'daemon_threads': True})
+            self.server = server_class((self.config.host, self.config.port), handler)
+
+            logging.info(f'Prediction service listening on {self.config.host}:{self.server.server_port}')
+            return self.server
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def main(self):
+        '''
+        This function serves requests until the process is interrupted
+        '''
+        server = self.create_server()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info('Prediction service interrupted')
+        finally:
+            server.server_close()
+            self.batcher.stop()
+
+
+if __name__ == '__main__':
+    config_manager = ConfigurationManager()
+    config = config_manager.get_prediction_service_config()
+    configure_logging(config.log_level, config.queue_logging, config.request_log_sample_rate)
+    instrumentation.configure(config_manager.get_instrumentation_config())
+    PredictionService(config).main()
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from src.logger import logging, log_request, configure_logging
+from src.exception import CustomException
+from src.config.configuration import ConfigurationManager
+from src.entity.config_entity import PredictionServiceConfig
+from src.pipeline.stage_04_predict_pipeline import PredictionPipeline, FEATURE_COLUMNS
+from src.pipeline.stage_06_prediction_service import parse_payload, format_prediction
+import warnings
+warnings.filterwarnings('ignore')
+
+# prediction pipeline of the current worker process, created once by init_worker
+worker_pipeline = None
+
+
+def init_worker(preprocessor_path: str, model_path: str, compiled_preprocessor_path: str,
+                log_level: str = 'INFO', queue_logging: bool = True, request_log_sample_rate: float = 1.0):
+    '''
+    This function runs once in every worker process, it configures the logging of the worker like the service and loads the preprocessor and model
+    '''
+    global worker_pipeline
+    configure_logging(log_level, queue_logging, request_log_sample_rate)
+    worker_pipeline = PredictionPipeline(preprocessor_path, model_path, compiled_preprocessor_path)
+    worker_pipeline.load_artifacts()
+
+
+def predict_in_worker(records: list) -> list:
+    '''
+    This function scores the applicants of one request inside a worker process
+
+    Args:
+        - records : list : dictionaries from feature name to value
+
+    Returns:
+        - list : predicted class and class probabilities of every applicant
+    '''
+    features = pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+    predictions, probabilities = worker_pipeline.predict_proba(features)
+    return list(zip(predictions.tolist(), probabilities.tolist()))
+
+
+class AsyncPredictionService:
+    '''
+    This class serves the prediction API on an asyncio event loop and runs inference in a pool of worker processes,
+    each holding its own copy of the model, so CPU-bound models use every core without contending for the GIL
+    '''
+    def __init__(self, config: PredictionServiceConfig, prediction_pipeline: PredictionPipeline = None):
+        '''
+        Constructor for AsyncPredictionService class
+
+        Args:
+            - config : PredictionServiceConfig : address, worker count, backpressure and timeout settings
+            - prediction_pipeline : PredictionPipeline : pipeline whose artifact paths the workers load
+        '''
+        self.config = config
+        self.prediction_pipeline = prediction_pipeline or PredictionPipeline()
+        self.pool = None
+        self.server = None
+        self.connections = set()
+        self.in_flight = 0
+        self.idle = None
+        self.stopping = None
+        self.workers = config.workers if config.workers > 0 else os.cpu_count()
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        '''
+        This function routes one HTTP request
+
+        Returns:
+            - status : HTTPStatus : response status
+            - response : dict : JSON response body
+        '''
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok', 'in_flight': self.in_flight}
+
+        if method != 'POST' or path != '/predict':
+            return HTTPStatus.NOT_FOUND, {'error': f'Unknown path {path}'}
+
+        if self.stopping.is_set():
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Service is shutting down'}
+
+        # backpressure: reject instead of queueing without bound when the workers are saturated
+        if self.in_flight >= self.config.max_pending_requests:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Too many pending requests'}
+
+        try:
+            records, is_batch = parse_payload(json.loads(body))
+        except (ValueError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+
+        try:
+            loop = asyncio.get_running_loop()
+            prediction = loop.run_in_executor(self.pool, predict_in_worker, records)
+        except Exception as e:
+            logging.error(f'Prediction failed: {e}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Prediction failed'}
+
+        # a call running in a worker cannot be cancelled, so its slot is released when it finishes, not when the request gives up
+        self.in_flight += 1
+        self.idle.clear()
+        prediction.add_done_callback(self.release_slot)
+
+        try:
+            # shielded, so that a timeout leaves the call running instead of marking it cancelled
+            predictions = await asyncio.wait_for(asyncio.shield(prediction), timeout=self.config.request_timeout)
+        except asyncio.TimeoutError:
+            return HTTPStatus.GATEWAY_TIMEOUT, {'error': 'Prediction timed out'}
+        except Exception as e:
+            logging.error(f'Prediction failed: {e}')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Prediction failed'}
+
+        if is_batch:
+            return HTTPStatus.OK, {'predictions': [format_prediction(*scored) for scored in predictions]}
+        return HTTPStatus.OK, format_prediction(*predictions[0])
+
+    def release_slot(self, prediction: asyncio.Future):
+        '''
+        This function frees the backpressure slot of a prediction once its worker call has finished
+        '''
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.idle.set()
+
+        # the result of a request that timed out is never awaited
+        if not prediction.cancelled() and prediction.exception() is not None:
+            logging.debug(f'Prediction finished with an error: {prediction.exception()}')
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''
+        This function reads HTTP/1.1 requests from one connection, keeping it alive until the client closes it
+        '''
+        self.connections.add(writer)
+        try:
+            while not self.stopping.is_set():
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                start = time.perf_counter()
+                status, response = await self.dispatch(method, path, body)
+
+                if path == '/predict':
+                    rows = len(response['predictions']) if 'predictions' in response else int(status == HTTPStatus.OK)
+                    log_request(logging.INFO if status == HTTPStatus.OK else logging.WARNING,
+                                event='http_predict', status=status.value, rows=rows,
+                                latency_ms=round((time.perf_counter() - start) * 1000, 3))
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and not self.stopping.is_set()
+                content = json.dumps(response).encode()
+                writer.write(
+                    f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(content)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + content
+                )
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def serve(self):
+        '''
+        This function starts the worker pool and the server, and shuts both down gracefully on SIGINT or SIGTERM:
+        new requests are refused, in-flight requests are given shutdown_timeout seconds to finish, then the workers exit
+
+        Raises:
+            - CustomException : if the service cannot be started
+        '''
+        try:
+            self.idle = asyncio.Event()
+            self.idle.set()
+            self.stopping = asyncio.Event()
+
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(self.prediction_pipeline.preprocessor_path,
+                          self.prediction_pipeline.model_path,
+                          self.prediction_pipeline.compiled_preprocessor_path,
+                          self.config.log_level,
+                          self.config.queue_logging,
+                          self.config.request_log_sample_rate)
+            )
+
+            loop = asyncio.get_running_loop()
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signal_number, self.stopping.set)
+
+            self.server = await asyncio.start_server(self.handle_connection, self.config.host, self.config.port)
+            port = self.server.sockets[0].getsockname()[1]
+            logging.info(f'Async prediction service listening on {self.config.host}:{port} with {self.workers} workers')
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+        try:
+            await self.stopping.wait()
+            logging.info('Async prediction service is shutting down')
+        finally:
+            self.server.close()
+
+            try:
+                await asyncio.wait_for(self.idle.wait(), timeout=self.config.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f'{self.in_flight} requests were still running at shutdown')
+
+            # idle keep-alive connections would otherwise keep the server open
+            for writer in list(self.connections):
+                writer.close()
+            await self.server.wait_closed()
+
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            logging.info('Async prediction service stopped')
+
+    def main(self):
+        '''
+        This function serves requests until the process receives SIGINT or SIGTERM
+        '''
+        asyncio.run(self.serve())
+
+
+if __name__ == '__main__':
+    config = ConfigurationManager().get_prediction_service_config()
+    configure_logging(config.log_level, config.queue_logging, config.request_log_sample_rate)
+    AsyncPredictionService(config).main()
@@ -0,0 +1,65 @@
+import sys
+import argparse
+from dataclasses import replace
+from src.logger import logging
+from src.exception import CustomException
+from src.config.configuration import ConfigurationManager
+from src.components.data_transformation import DataTransformation
+from src.components.model_building_and_evaluation import ModelBuilding
+from src.components.model_benchmark import ModelBenchmark
+import warnings
+warnings.filterwarnings("ignore")
+
+STAGE_NAME = "Model Benchmark"
+
+
+class ModelBenchmarkPipeline:
+    '''
+    This class is responsible for initiating the Model Benchmark Pipeline
+    '''
+    def __init__(self, scales: list = None):
+        '''
+        Constructor for ModelBenchmarkPipeline class
+
+        Args:
+            - scales : list : numbers of applicants to benchmark, defaults to the scales in the configuration file
+        '''
+        self.scales = scales
+        logging.info("Model Benchmark Pipeline initiated")
+
+    def main(self):
+        '''
+        This function initiates the Model Benchmark Pipeline
+
+        Returns:
+            - results: Benchmark of every model at every scale
+
+        Raises:
+            - CustomException: If any error occurs while initiating the Model Benchmark Pipeline
+        '''
+        try:
+            config = ConfigurationManager()
+            model_benchmark_config = config.get_model_benchmark_config()
+            if self.scales:
+                model_benchmark_config = replace(model_benchmark_config, scales=self.scales)
+
+            model_benchmark = ModelBenchmark(
+                config = model_benchmark_config,
+                data_transformation = DataTransformation(config.get_data_transformation_config()),
+                model_building = ModelBuilding(config.get_model_config())
+            )
+
+            return model_benchmark.initiate_model_benchmark()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the candidate models on synthetic applicants')
+    parser.add_argument('--scales', type=int, nargs='+', help='numbers of applicants, overrides the configuration file')
+    args = parser.parse_args()
+
+    logging.info(f"Starting {STAGE_NAME} Pipeline")
+    ModelBenchmarkPipeline(scales=args.scales).main()
+    logging.info(f"Completed {STAGE_NAME} Pipeline")
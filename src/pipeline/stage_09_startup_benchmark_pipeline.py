@@ -0,0 +1,59 @@
+import sys
+import argparse
+from dataclasses import replace
+from src.logger import logging
+from src.exception import CustomException
+from src.config.configuration import ConfigurationManager
+from src.components.startup_benchmark import StartupBenchmark
+import warnings
+warnings.filterwarnings("ignore")
+
+STAGE_NAME = "Startup Benchmark"
+
+
+class StartupBenchmarkPipeline:
+    '''
+    This class is responsible for initiating the Startup Benchmark Pipeline
+    '''
+    def __init__(self, repeats: int = None):
+        '''
+        Constructor for StartupBenchmarkPipeline class
+
+        Args:
+            - repeats : int : fresh interpreters started per entry point, defaults to the repeats in the configuration file
+        '''
+        self.repeats = repeats
+        logging.info("Startup Benchmark Pipeline initiated")
+
+    def main(self):
+        '''
+        This function initiates the Startup Benchmark Pipeline
+
+        Returns:
+            - results: Startup timings of every serving entry point
+
+        Raises:
+            - CustomException: If any error occurs while initiating the Startup Benchmark Pipeline
+        '''
+        try:
+            config = ConfigurationManager()
+            startup_benchmark_config = config.get_startup_benchmark_config()
+            if self.repeats:
+                startup_benchmark_config = replace(startup_benchmark_config, repeats=self.repeats)
+
+            startup_benchmark = StartupBenchmark(config=startup_benchmark_config)
+
+            return startup_benchmark.initiate_startup_benchmark()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of the serving entry points')
+    parser.add_argument('--repeats', type=int, help='fresh interpreters started per entry point, overrides the configuration file')
+    args = parser.parse_args()
+
+    logging.info(f"Starting {STAGE_NAME} Pipeline")
+    StartupBenchmarkPipeline(repeats=args.repeats).main()
+    logging.info(f"Completed {STAGE_NAME} Pipeline")
@@ -0,0 +1,148 @@
+import sys
+import queue
+import threading
+from concurrent.futures import Future
+from src.logger import logging
+from src.exception import CustomException
+from src.utils.instrumentation import instrumentation
+
+
+class ArtifactWriter:
+    '''
+    Class to persist artifacts off the critical path: writes are queued and run on a pool of background threads,
+    so a stage can hand its outputs to the next stage in memory while they are being saved. Independent writes run
+    at the same time, in submission order, a write that must follow the others is queued with submit_when_written.
+    When asynchronous is False every write runs immediately in the calling thread and raises its error there
+    '''
+    def __init__(self, asynchronous: bool = True, max_workers: int = 1):
+        '''
+        Constructor for ArtifactWriter class
+
+        Args:
+            - asynchronous: Whether writes run on the background threads
+            - max_workers: Number of background threads, i.e. of writes running at the same time
+        '''
+        self.asynchronous = asynchronous
+        self.writes = queue.Queue()
+        self.futures = []
+        self.workers = []
+
+        if asynchronous:
+            self.workers = [
+                threading.Thread(target=self.run, name=f'artifact-writer-{index}', daemon=True)
+                for index in range(max(1, max_workers))
+            ]
+            for worker in self.workers:
+                worker.start()
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        '''
+        This function queues a write, the objects passed must not be modified afterwards
+
+        Args:
+            - function: Function performing the write, e.g. save_object or save_dataframe
+            - args, kwargs: Arguments of the function
+
+        Returns:
+            - Future: Resolves once the write has completed
+
+        Raises:
+            - Exception: The error of the write, when the writer is synchronous
+        '''
+        return self.enqueue(function, args, kwargs, dependencies=[])
+
+    def submit_when_written(self, function, *args, **kwargs) -> Future:
+        '''
+        This function queues a write that runs once every write submitted before it has completed, and is skipped
+        if any of them failed, e.g. a manifest that must only record files that were written
+
+        Args:
+            - function: Function performing the write
+            - args, kwargs: Arguments of the function
+
+        Returns:
+            - Future: Resolves once the write has completed, fails with the error of the first failed earlier write
+
+        Raises:
+            - Exception: The error of the write or of an earlier write, when the writer is synchronous
+        '''
+        return self.enqueue(function, args, kwargs, dependencies=list(self.futures))
+
+    def enqueue(self, function, args, kwargs, dependencies: list) -> Future:
+        future = Future()
+        self.futures.append(future)
+
+        if not self.asynchronous:
+            self.execute(future, function, args, kwargs, dependencies)
+            # raises like the write itself would have without the writer
+            future.result()
+        else:
+            self.writes.put((future, function, args, kwargs, dependencies))
+
+        return future
+
+    def execute(self, future: Future, function, args, kwargs, dependencies: list):
+        try:
+            for dependency in dependencies:
+                dependency.result()
+        except Exception as e:
+            logging.error(f"Skipping {function.__name__}, an artifact written before it failed: {e}")
+            future.set_exception(e)
+            return
+
+        try:
+            with instrumentation.timer(f"artifact_writer.{function.__name__}"):
+                result = function(*args, **kwargs)
+            future.set_result(result)
+        except Exception as e:
+            logging.error(f"Writing an artifact with {function.__name__} failed: {e}")
+            future.set_exception(e)
+
+    def run(self):
+        '''
+        This function performs queued writes, in submission order across the threads, until the writer is closed.
+        A write waiting for earlier writes cannot block them, they have all been taken by a thread before it
+        '''
+        while True:
+            write = self.writes.get()
+            if write is None:
+                break
+            self.execute(*write)
+
+    def flush(self):
+        '''
+        This function waits for every queued write
+
+        Raises:
+            - CustomException: If any write failed
+        '''
+        try:
+            futures, self.futures = self.futures, []
+            for future in futures:
+                future.result()
+            if futures:
+                logging.info(f"{len(futures)} artifacts have been written")
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        '''
+        This function waits for every queued write and stops the background threads
+
+        Raises:
+            - CustomException: If any write failed
+        '''
+        try:
+            self.flush()
+        finally:
+            alive = [worker for worker in self.workers if worker.is_alive()]
+            for _ in alive:
+                self.writes.put(None)
+            for worker in alive:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -6,20 +6,21 @@ from box import ConfigBox
 from pathlib import Path
 from src.logger import logging
 from src.exception import CustomException
+from src.utils.instrumentation import instrumentation
 from ensure import ensure_annotations
 import pickle
-import mysql.connector as mysql
+import time
 from dotenv import load_dotenv
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import accuracy_score
+import scipy.sparse
 import json
-# import percision, recall, f1_score, confusion_matrix
-from sklearn.metrics import precision_score, recall_score,f1_score, confusion_matrix
+# the object cache lives in a light module so that serving does not import the training utilities, re-exported here
+from src.utils.object_cache import load_object, load_cached_object
+# mysql.connector, the sklearn searches and metrics and joblib are imported by the functions using them,
+# importing this module for its configuration helpers stays fast
 load_dotenv()
 
-
 @ensure_annotations
 def read_yaml_file(yamal_file_path: Path) -> ConfigBox:
     '''Reads a yaml file and returns the content as a dictionary
@@ -78,8 +79,11 @@ def save_object(object, object_path: str, verbose: bool = True):
     '''
     try:
         logging.info(f"Saving model at path {object_path}")
-        with open(object_path, 'wb') as file:
+        # write to a temporary file first so readers never see a half-written object
+        temp_path = f"{object_path}.tmp"
+        with open(temp_path, 'wb') as file:
             pickle.dump(object, file)
+        os.replace(temp_path, object_path)
         if verbose:
             logging.info(f"Model saved at path {object_path}")
 
@@ -87,31 +91,43 @@ def save_object(object, object_path: str, verbose: bool = True):
         raise CustomException(e, sys)
 
 @ensure_annotations
-def load_object(object_path: str):
-    '''Load the model from the joblib file
+def get_sql_connection(source='mysql', sqlite_path=None):
+    '''Open a connection to the database holding the admission table
 
     Args:
-        object_path (str): Path to the joblib file
+        source (str): 'mysql' to connect with the MYSQL_* environment variables or 'sqlite' for a local database file
+        sqlite_path (str): Path to the SQLite database file, used when source is 'sqlite'
 
     Returns:
-        object: Model loaded from the joblib file
+        connection: DB-API connection to the database
 
     Raises:
-        CustomException: If there is an error loading the model
+        ValueError: If the source is not supported
     '''
-    try:
-        logging.info(f"Loading model from path {object_path}")
-        with open(object_path, 'rb') as file:
-            object = pickle.load(file)
-        logging.info(f"Model loaded from path {object_path}")
-        return object
-    except Exception as e:
-        raise CustomException(e, sys)
-    
+    if source == 'mysql':
+        import mysql.connector as mysql
+        return mysql.connect(
+            host=os.getenv('MYSQL_HOST'),
+            user=os.getenv('MYSQL_USER'),
+            password=os.getenv('MYSQL_PASSWORD'),
+            database=os.getenv('MYSQL_DATABASE')
+        )
+
+    if source == 'sqlite':
+        import sqlite3
+        return sqlite3.connect(sqlite_path)
+
+    raise ValueError(f"Unsupported SQL source: {source}, expected mysql or sqlite")
+
 @ensure_annotations
-def read_sql_data():
+def read_sql_data(query="SELECT * FROM admission", source='mysql', sqlite_path=None):
     '''Read data from a SQL database
 
+    Args:
+        query (str): Query to run, defaults to the whole admission table
+        source (str): 'mysql' or 'sqlite', see get_sql_connection
+        sqlite_path (str): Path to the SQLite database file, used when source is 'sqlite'
+
     Returns:
         pd.DataFrame: Data read from the database
 
@@ -120,41 +136,566 @@ def read_sql_data():
     '''
     try:
         logging.info("Reading data from SQL database")
-        conn = mysql.connect(
-            host=os.getenv('MYSQL_HOST'),
-            user=os.getenv('MYSQL_USER'),
-            password=os.getenv('MYSQL_PASSWORD'),
-            database=os.getenv('MYSQL_DATABASE')
-        )
+        conn = get_sql_connection(source, sqlite_path)
+
+        try:
+            data = pd.read_sql(query, conn)
+        finally:
+            conn.close()
 
-        data = pd.read_sql("SELECT * FROM admission", conn)
         logging.info("Successfully read data from SQL database")
         return data
     except Exception as ex:
-        raise CustomException(ex)
+        raise CustomException(ex, sys)
+
+def read_sql_data_in_chunks(query, chunksize=50000, source='mysql', sqlite_path=None, params=None):
+    '''Read data from a SQL database lazily, one chunk at a time
+
+    The rows are fetched from an unbuffered cursor, so only one chunk is held in memory at a time.
+
+    Args:
+        query (str): Query to run
+        chunksize (int): Number of rows per chunk
+        source (str): 'mysql' or 'sqlite', see get_sql_connection
+        sqlite_path (str): Path to the SQLite database file, used when source is 'sqlite'
+        params: Parameters bound to the query
+
+    Yields:
+        pd.DataFrame: Chunk of the query result
+
+    Raises:
+        CustomException: If there is an error reading the data
+    '''
+    try:
+        logging.info(f"Reading data from SQL database in chunks of {chunksize} rows")
+        conn = get_sql_connection(source, sqlite_path)
+
+        try:
+            yield from pd.read_sql(query, conn, params=params, chunksize=chunksize)
+        finally:
+            conn.close()
+
+        logging.info("Successfully read data from SQL database")
+    except Exception as ex:
+        raise CustomException(ex, sys)
+
+@ensure_annotations
+def downcast_dtypes(data, categorical_columns: list, float_columns: list):
+    '''Downcast the columns of a dataframe to compact dtypes, columns that are not present are ignored
+
+    Args:
+        data (pd.DataFrame): Data to downcast
+        categorical_columns (list): Columns converted to the category dtype
+        float_columns (list): Columns converted to float32
+
+    Returns:
+        pd.DataFrame: Downcasted data
+    '''
+    for column in categorical_columns:
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+
+    for column in float_columns:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], errors='coerce').astype(np.float32)
+
+    return data
+
+class ChunkedDataFrameWriter:
+    '''
+    Class to write a dataframe to a .csv or .parquet file one chunk at a time
+    '''
+    def __init__(self, path, append=False):
+        '''
+        Constructor for ChunkedDataFrameWriter class
+
+        Args:
+            path (str): Path of the file, the format is chosen by the file extension
+            append (bool): If True, chunks are added to an existing .csv file instead of overwriting it
+
+        Raises:
+            ValueError: If the file extension is not supported
+        '''
+        self.path = path
+        self.extension = os.path.splitext(path)[1].lower()
+        if self.extension not in ('.csv', '.parquet'):
+            raise ValueError(f"Unsupported file format for chunked writing: {self.extension}")
+
+        self.append = append and self.extension == '.csv' and os.path.exists(path)
+        self.parquet_writer = None
+        self.rows_written = 0
+
+    def write(self, chunk):
+        '''
+        This function appends a chunk to the file
+
+        Args:
+            chunk (pd.DataFrame): Chunk to write, all chunks must have the same columns
+        '''
+        if chunk.empty:
+            return
+
+        # categories differ from chunk to chunk, both formats store them as plain values
+        categorical_columns = chunk.select_dtypes('category').columns
+        if len(categorical_columns):
+            chunk = chunk.astype({column: object for column in categorical_columns})
+
+        if self.extension == '.csv':
+            first_write = self.rows_written == 0 and not self.append
+            chunk.to_csv(self.path, mode='w' if first_write else 'a', header=first_write, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self.parquet_writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                # a column that is null throughout the first chunk has no type yet, e.g. race when every applicant
+                # of the chunk is international, its values are strings in the chunks that follow
+                schema = pa.schema(
+                    [pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in table.schema],
+                    metadata=table.schema.metadata
+                )
+                table = table.cast(schema)
+                self.parquet_writer = pq.ParquetWriter(self.path, schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self.parquet_writer.schema, preserve_index=False)
+            self.parquet_writer.write_table(table)
+
+        self.rows_written += len(chunk)
+
+    def close(self):
+        '''
+        This function closes the file
+        '''
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
     
+@ensure_annotations
+def save_dataframe(data, path):
+    '''
+    This function saves a dataframe to the specified path, the format is chosen by the file extension
+
+    Args:
+        data: pd.DataFrame to be saved
+        path: Path to save the data, ending in .csv or .parquet
+
+    Raises:
+        CustomException: If the file extension is not supported or there is an error saving the data
+    '''
+    try:
+        extension = os.path.splitext(path)[1].lower()
+        logging.info(f"Saving dataframe to path {path}")
+
+        if extension == '.csv':
+            data.to_csv(path, index=False, header=True)
+        elif extension == '.parquet':
+            data.to_parquet(path, index=False)
+        else:
+            raise ValueError(f"Unsupported file format for dataframe: {extension}")
+
+        logging.info(f"Dataframe saved to path {path}")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+@ensure_annotations
+def read_dataframe(path):
+    '''
+    This function reads a dataframe from the specified path, the format is chosen by the file extension.
+    A directory is read as a partitioned store, concatenating its .csv and .parquet files in name order
+
+    Args:
+        path: Path of the data, ending in .csv or .parquet, or a directory of partitions
+
+    Returns:
+        pd.DataFrame: Data read from the file
+
+    Raises:
+        CustomException: If the file extension is not supported, a directory has no partitions or there is an error reading the data
+    '''
+    try:
+        if os.path.isdir(path):
+            partitions = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if os.path.splitext(name)[1].lower() in ('.csv', '.parquet')
+            )
+            if not partitions:
+                # e.g. an incremental ingestion whose first run found no rows
+                raise ValueError(f"Partitioned store {path} contains no .csv or .parquet files, no data has been ingested into it yet")
+            logging.info(f"Reading {len(partitions)} partitions from directory {path}")
+            return pd.concat([read_dataframe(partition) for partition in partitions], ignore_index=True)
+
+        extension = os.path.splitext(path)[1].lower()
+        logging.info(f"Reading dataframe from path {path}")
+
+        if extension == '.csv':
+            return pd.read_csv(path)
+        if extension == '.parquet':
+            return pd.read_parquet(path)
+
+        raise ValueError(f"Unsupported file format for dataframe: {extension}")
+    except Exception as e:
+        raise CustomException(e, sys)
+
 @ensure_annotations
 def save_transformed_data(data, path):
     '''
-    This function saves the transformed data to the specified path
+    This function saves the transformed data to the specified path, the format is chosen by the file extension:
+    .npy is a binary NumPy array that can be memory-mapped when loaded, .parquet and .csv are tabular files,
+    .npz is a compressed sparse matrix and is the only format that keeps sparse data sparse
 
     Args:
         data: Data to be saved
         path: Path to save the data
-        preprocessors: Preprocessor object used to transform the data
+
+    Raises:
+        CustomException: If the file extension is not supported or there is an error saving the data
     '''
     try:
+        extension = os.path.splitext(path)[1].lower()
         logging.info(f"Saving transformed data to path {path}")
-        data = pd.DataFrame(data)
-        data.to_csv(path, index=False, header=True)
+
+        if extension == '.npz':
+            scipy.sparse.save_npz(path, scipy.sparse.csr_matrix(data))
+        elif scipy.sparse.issparse(data):
+            raise ValueError(f"Sparse transformed data must be saved as .npz, not {extension}")
+        elif extension == '.npy':
+            np.save(path, np.asarray(data))
+        elif extension == '.parquet':
+            data = pd.DataFrame(data)
+            # parquet requires string column names
+            data.columns = data.columns.astype(str)
+            data.to_parquet(path, index=False)
+        elif extension == '.csv':
+            data = pd.DataFrame(data)
+            data.to_csv(path, index=False, header=True)
+        else:
+            raise ValueError(f"Unsupported file format for transformed data: {extension}")
+
         logging.info(f"Data saved to path {path}")
     except Exception as e:
         raise CustomException(e, sys)
+
+@ensure_annotations
+def load_transformed_data(path, mmap_mode='r'):
+    '''
+    This function loads the transformed data saved by save_transformed_data
+
+    Args:
+        path: Path of the data
+        mmap_mode: Memory-map mode used for .npy files, None reads the whole array into memory
+
+    Returns:
+        np.ndarray: Transformed data, memory-mapped for .npy files, a CSR matrix for .npz files
+
+    Raises:
+        CustomException: If the file extension is not supported or there is an error loading the data
+    '''
+    try:
+        extension = os.path.splitext(path)[1].lower()
+        logging.info(f"Loading transformed data from path {path}")
+
+        if extension == '.npy':
+            return np.load(path, mmap_mode=mmap_mode)
+        if extension == '.npz':
+            return scipy.sparse.load_npz(path).tocsr()
+        if extension == '.parquet':
+            return pd.read_parquet(path).to_numpy()
+        if extension == '.csv':
+            return pd.read_csv(path, float_precision='round_trip').to_numpy()
+
+        raise ValueError(f"Unsupported file format for transformed data: {extension}")
+    except Exception as e:
+        raise CustomException(e, sys)
     
 @ensure_annotations
-def eval_model(X_train, X_test, y_train, y_test, models, params):
+def get_fold_plan(y_train, cv: int = 5) -> list:
+    '''
+    This method computes the cross validation folds once, so that every model is searched on identical splits.
+
+    Args:
+    y_train: np.ndarray
+        The target feature of the training data, the folds are stratified on it
+    cv: int
+        The number of cross validation folds
+
+    Returns:
+    folds: list
+        The (train indices, validation indices) of every fold, as int32 arrays
+    '''
+    from sklearn.model_selection import StratifiedKFold
+
+    splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+    return [
+        (train_index.astype(np.int32), validation_index.astype(np.int32))
+        for train_index, validation_index in splitter.split(np.zeros(len(y_train)), y_train)
+    ]
+
+@ensure_annotations
+def get_search_cv(model, param, search_strategy: str = 'grid', cv: int = 5, n_iter: int = 10, factor: int = 3, n_jobs: int = 1,
+                  folds=None):
+    '''
+    This method creates the hyperparameter search object for the given strategy.
+
+    Args:
+    model: estimator
+        The model object
+    param: dict
+        The hyperparameter grid of the model
+    search_strategy: str
+        'grid' for an exhaustive search, 'random' for a randomized search over n_iter settings
+        or 'halving' for a successive halving search
+    cv: int
+        The number of cross validation folds
+    n_iter: int
+        The number of parameter settings sampled by the randomized search
+    factor: int
+        The proportion of candidates kept in each iteration of the successive halving search
+    n_jobs: int
+        The number of cores used by the search
+    folds: list
+        The precomputed folds from get_fold_plan, used instead of cv by the grid and randomized searches
+
+    Returns:
+    search: BaseSearchCV
+        The unfitted search object
+
+    Raises:
+    ValueError: If the search strategy is not supported
+    '''
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, StratifiedKFold
+
+    splits = folds if folds is not None else cv
+
+    if search_strategy == 'grid':
+        return GridSearchCV(model, param, cv=splits, n_jobs=n_jobs)
+
+    if search_strategy == 'random':
+        return RandomizedSearchCV(model, param, n_iter=n_iter, cv=splits, n_jobs=n_jobs, random_state=42)
+
+    if search_strategy == 'halving':
+        # successive halving subsamples the training data at every iteration, so fixed indices do not apply,
+        # the same seeded splitter still gives every model identical folds
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401 enables HalvingGridSearchCV
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+        return HalvingGridSearchCV(model, param, factor=factor, cv=splitter, n_jobs=n_jobs, random_state=42)
+
+    raise ValueError(f"Unsupported search strategy: {search_strategy}, expected one of grid, random or halving")
+
+def predict_labels(model, X):
+    '''
+    This method predicts the labels the prediction services return: the most probable class,
+    so that a model is evaluated and selected on exactly what it will serve.
+
+    Args:
+    model: estimator
+        The fitted model
+    X: np.ndarray
+        The input features
+
+    Returns:
+    np.ndarray
+        The most probable class of every row, or the predicted class for models without probabilities
+    '''
+    if hasattr(model, 'predict_proba'):
+        return model.classes_[np.argmax(model.predict_proba(X), axis=1)]
+    return model.predict(X)
+
+def measure_inference_cost(model, X_test, latency_repeats: int = 20) -> dict:
+    '''
+    This method measures what serving a fitted model costs: the single-row and per-row batch predict latency and the pickled size.
+
+    Args:
+    model: estimator
+        The fitted model
+    X_test: np.ndarray
+        The test data, its first row is used for the single-row latency
+    latency_repeats: int
+        The number of single-row predictions timed, the median is reported
+
+    Returns:
+    dict
+        predict_latency_ms, batch_latency_us_per_row and model_size_bytes
+    '''
+    single_row = X_test[:1]
+    predict_labels(model, single_row)
+
+    latencies = []
+    for _ in range(latency_repeats):
+        start = time.perf_counter()
+        predict_labels(model, single_row)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predict_labels(model, X_test)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "predict_latency_ms": float(np.median(latencies) * 1000),
+        "batch_latency_us_per_row": batch_seconds * 1e6 / X_test.shape[0],
+        "model_size_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    }
+
+def get_checkpoint_key(data_key: str, model_name: str, model, param: dict, search_params: dict) -> str:
+    '''
+    This method identifies the search of one model, a checkpoint is only reused when the data, the model and its settings are unchanged.
+
+    Args:
+    data_key: str
+        The fingerprint of the training and test data
+    model_name: str
+        The name of the model
+    model: estimator
+        The model object
+    param: dict
+        The hyperparameter grid of the model
+    search_params: dict
+        The settings of the search
+
+    Returns:
+    str
+        The sha256 hex digest identifying the search
+    '''
+    from src.utils.stage_cache import fingerprint_input
+
+    model_settings = json.dumps(model.get_params(deep=True), sort_keys=True, default=repr)
+    return fingerprint_input([data_key, model_name, type(model).__name__, model_settings, param, search_params])
+
+def load_checkpoint(checkpoint_path: str, checkpoint_key: str):
+    '''
+    This method loads the result of a finished model search.
+
+    Returns:
+    tuple
+        The result of search_model, None if there is no checkpoint for this exact search or it cannot be read
+    '''
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        checkpoint = load_object(checkpoint_path)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return None
+    if checkpoint.get('key') != checkpoint_key:
+        return None
+    return checkpoint['result']
+
+def search_model(model_name, model, param, X_train, X_test, y_train, y_test, n_jobs=1, search_params=None, folds=None,
+                 checkpoint_path=None, checkpoint_key=None):
+    '''
+    This method runs the hyperparameter search for a single model and evaluates the best estimator.
+    It is executed in a worker process by eval_model, so it must only depend on its arguments.
+
+    Args:
+    model_name: str
+        The name of the model
+    model: estimator
+        The model object
+    param: dict
+        The hyperparameter grid of the model
+    X_train, X_test, y_train, y_test: np.ndarray
+        The training and test data
+    n_jobs: int
+        The number of cores given to the search of this model
+    search_params: dict
+        The keyword arguments passed to get_search_cv, defaults to an exhaustive 5 fold grid search
+    folds: list
+        The precomputed folds shared by all models, see get_fold_plan
+    checkpoint_path: str
+        The file the result is saved to as soon as the search finishes, so that a restarted run can skip it
+    checkpoint_key: str
+        The key identifying the search in the checkpoint, see get_checkpoint_key
+
+    Returns:
+    model_name: str
+        The name of the model
+    train_metrics: dict
+        The metrics of the best estimator on the training data
+    test_metrics: dict
+        The metrics of the best estimator on the test data, its inference cost is measured by eval_model
+    best_estimator: estimator
+        The best estimator refitted on the whole training data by the search, without its resampling step
+    '''
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+
+    gs = get_search_cv(model, param, n_jobs=n_jobs, folds=folds, **(search_params or {}))
+    search_start = time.perf_counter()
+    gs.fit(X_train, y_train)
+    search_seconds = time.perf_counter() - search_start
+
+    # select the best parameters, the search has already refitted the best estimator on the whole training data
+    best_params = {name.removeprefix('model__'): value for name, value in gs.best_params_.items()}
+    model = gs.best_estimator_
+
+    # resampling only happens while fitting, so the model is served and evaluated without the pipeline around it
+    if hasattr(model, 'named_steps') and 'resampler' in model.named_steps:
+        model = model.named_steps['model']
+
+    # the services return the most probable class, which for some models differs from their predict
+    y_train_pred = predict_labels(model, X_train)
+    y_test_pred = predict_labels(model, X_test)
+
+    train_model_accuracy = accuracy_score(y_train, y_train_pred)
+    test_model_accuracy = accuracy_score(y_test, y_test_pred)
+
+    train_model_precision = precision_score(y_train, y_train_pred, average='weighted')
+    test_model_precision = precision_score(y_test, y_test_pred, average='weighted')
+
+    train_model_recall = recall_score(y_train, y_train_pred, average='weighted')
+    test_model_recall = recall_score(y_test, y_test_pred, average='weighted')
+
+    train_model_f1_score = f1_score(y_train, y_train_pred, average='weighted')
+    test_model_f1_score = f1_score(y_test, y_test_pred, average='weighted')
+
+    train_model_confusion_matrix = confusion_matrix(y_train, y_train_pred).tolist()
+    test_model_confusion_matrix = confusion_matrix(y_test, y_test_pred).tolist()
+
+    train_metrics = {
+        "accuracy": train_model_accuracy,
+        "precision": train_model_precision,
+        "recall": train_model_recall,
+        "f1_score": train_model_f1_score,
+        "confusion_matrix": train_model_confusion_matrix,
+        "best_params": best_params
+    }
+
+    test_metrics = {
+        "accuracy": test_model_accuracy,
+        "precision": test_model_precision,
+        "recall": test_model_recall,
+        "f1_score": test_model_f1_score,
+        "confusion_matrix": test_model_confusion_matrix,
+        "best_params": best_params,
+        "search_seconds": search_seconds,
+        # mean fit and score time of every hyperparameter candidate over its folds, recorded by eval_model
+        "candidate_timings": [
+            {"params": {name.removeprefix('model__'): value for name, value in candidate_params.items()},
+             "mean_fit_seconds": float(fit_time), "mean_score_seconds": float(score_time)}
+            for candidate_params, fit_time, score_time in zip(gs.cv_results_['params'],
+                                                              gs.cv_results_['mean_fit_time'],
+                                                              gs.cv_results_['mean_score_time'])
+        ]
+    }
+
+    if checkpoint_path is not None:
+        save_object({'key': checkpoint_key, 'result': (model_name, train_metrics, test_metrics, model)}, checkpoint_path)
+
+    return model_name, train_metrics, test_metrics, model
+
+@ensure_annotations
+def eval_model(X_train, X_test, y_train, y_test, models, params, n_jobs: int = -1, search_params: dict = None,
+               checkpoint_dir: str = ''):
     '''
     This method evaluates the performance of the models on the test data.
+    The hyperparameter searches of the models run concurrently in separate processes.
     
     Args:
     X_train: np.ndarray
@@ -169,70 +710,89 @@ def eval_model(X_train, X_test, y_train, y_test, models, params):
         The dictionary containing the model objects
     param: dict
         The dictionary containing the hyperparameters for the models
+    n_jobs: int
+        The total number of cores used for the searches, -1 uses all cores
+    search_params: dict
+        The search strategy and its settings passed to get_search_cv, defaults to an exhaustive 5 fold grid search
+    checkpoint_dir: str
+        The directory where every finished model search is checkpointed, models with a matching checkpoint
+        are not searched again, an empty string disables checkpointing
 
     Returns:
-    report: dict
-        The dictionary containing the model names and their corresponding accuracy scores
+    training_metrics: dict
+        The dictionary containing the model names and their metrics on the training data
+    test_metrics: dict
+        The dictionary containing the model names and their metrics on the test data
+    fitted_models: dict
+        The dictionary containing the model names and their best estimators
     '''
+    from joblib import Parallel, delayed, effective_n_jobs
+
     try:
         training_metrics = {}
         test_metrics = {}
+        fitted_models = {}
 
-        for i in range(len(list(models))):
-            model_name = list(models.keys())[i]
-            model = models[model_name]
-            param = params[model_name]
+        results = {}
+        checkpoints = {}
 
-            print(i, model, param)
+        if checkpoint_dir:
+            from src.utils.stage_cache import fingerprint_input
 
-            gs = GridSearchCV(model, param, cv=5)
-            gs.fit(X_train, y_train)
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            data_key = fingerprint_input([fingerprint_input(data) for data in (X_train, X_test, y_train, y_test)])
 
-            # select the best parameters
-            best_params = gs.best_params_
-            model.set_params(**best_params)
+            for model_name, model in models.items():
+                checkpoint_path = os.path.join(checkpoint_dir, f"{model_name}.pkl")
+                checkpoint_key = get_checkpoint_key(data_key, model_name, model, params[model_name], search_params or {})
+                checkpoints[model_name] = (checkpoint_path, checkpoint_key)
 
-            model = model.fit(X_train, y_train)
+                result = load_checkpoint(checkpoint_path, checkpoint_key)
+                if result is not None:
+                    logging.info(f"Resuming {model_name} from its checkpoint at {checkpoint_path}")
+                    results[model_name] = result
 
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
+        pending = [model_name for model_name in models if model_name not in results]
 
-            train_model_accuracy = accuracy_score(y_train, y_train_pred)
-            test_model_accuracy = accuracy_score(y_test, y_test_pred)
+        if pending:
+            # one worker per model, the cores left over are shared by the searches
+            total_jobs = effective_n_jobs(n_jobs)
+            model_jobs = min(total_jobs, len(pending))
+            search_jobs = max(1, total_jobs // model_jobs)
 
-            train_model_precision = precision_score(y_train, y_train_pred, average='weighted')
-            test_model_precision = precision_score(y_test, y_test_pred, average='weighted')
+            logging.info(f"Searching {len(pending)} models with {model_jobs} workers and {search_jobs} cores per search")
 
-            train_model_recall = recall_score(y_train, y_train_pred, average='weighted')
-            test_model_recall = recall_score(y_test, y_test_pred, average='weighted')
+            folds = get_fold_plan(y_train, cv=(search_params or {}).get('cv', 5))
+            logging.info(f"Computed {len(folds)} cross validation folds shared by all models")
 
-            train_model_f1_score = f1_score(y_train, y_train_pred, average='weighted')
-            test_model_f1_score = f1_score(y_test, y_test_pred, average='weighted')
+            # arrays above max_nbytes, including the fold indices, are dumped once to a shared memory-map
+            # that every worker opens read-only instead of receiving its own copy
+            searched = Parallel(n_jobs=model_jobs, max_nbytes='1M', mmap_mode='r')(
+                delayed(search_model)(model_name, models[model_name], params[model_name], X_train, X_test, y_train, y_test,
+                                      search_jobs, search_params, folds, *checkpoints.get(model_name, (None, None)))
+                for model_name in pending
+            )
+            results.update((result[0], result) for result in searched)
 
-            train_model_confusion_matrix = confusion_matrix(y_train, y_train_pred).tolist()
-            test_model_confusion_matrix = confusion_matrix(y_test, y_test_pred).tolist()
+        for model_name, train_metrics, model_test_metrics, model in (results[model_name] for model_name in models):
+            # the searches ran in worker processes, so their timings are recorded here
+            instrumentation.record_time(f"search.{model_name}", model_test_metrics['search_seconds'])
+            for candidate in model_test_metrics.pop('candidate_timings', []):
+                candidate_name = f"search.{model_name}.candidate.{json.dumps(candidate['params'], sort_keys=True, default=str)}"
+                instrumentation.record_time(f"{candidate_name}.fit", candidate['mean_fit_seconds'])
+                instrumentation.record_time(f"{candidate_name}.score", candidate['mean_score_seconds'])
 
-            
+            # timed one model at a time once the searches are done, timings taken in the workers while other searches
+            # were saturating the cores would depend on how the searches were scheduled
+            model_test_metrics.update(measure_inference_cost(model, X_test))
 
-            training_metrics[model_name] = {
-                "accuracy": train_model_accuracy,
-                "precision": train_model_precision,
-                "recall": train_model_recall,
-                "f1_score": train_model_f1_score,
-                "confusion_matrix": train_model_confusion_matrix,
-                "best_params": best_params
-            }
+            training_metrics[model_name] = train_metrics
+            test_metrics[model_name] = model_test_metrics
+            fitted_models[model_name] = model
 
-            test_metrics[model_name] = {
-                "accuracy": test_model_accuracy,
-                "precision": test_model_precision,
-                "recall": test_model_recall,
-                "f1_score": test_model_f1_score,
-                "confusion_matrix": test_model_confusion_matrix,
-                "best_params": best_params
-            }
+            logging.info(f"{model_name} has been evaluated with best parameters {train_metrics['best_params']}")
 
-        return training_metrics, test_metrics
+        return training_metrics, test_metrics, fitted_models
 
     except Exception as e:
         raise CustomException(e, sys)
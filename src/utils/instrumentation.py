@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from src.logger import logging
+from src.exception import CustomException
+
+
+class Instrumentation:
+    '''
+    Class to record timers, counters and optional cProfile and tracemalloc captures of a process and save them as JSON.
+    Nothing is recorded until it is enabled by configure, so the timers can stay on the hot paths
+    '''
+    def __init__(self):
+        self.enabled = False
+        self.config = None
+        self.timers = {}
+        self.counters = {}
+        self.memory = {}
+        self.profiles = {}
+        self.lock = threading.Lock()
+
+    def configure(self, config):
+        '''
+        This function enables or disables the instrumentation of the current process, when enabled the metrics are
+        saved to config.metrics_path when the process exits
+
+        Args:
+            - config: InstrumentationConfig object
+        '''
+        self.config = config
+        self.enabled = config.enabled
+
+        if self.enabled:
+            atexit.register(self.save)
+            logging.info(f"Instrumentation enabled, metrics will be saved at {config.metrics_path}")
+
+    def record_time(self, name: str, seconds: float):
+        '''
+        This function adds one measurement to a timer
+
+        Args:
+            - name: Name of the timer
+            - seconds: Measured duration
+        '''
+        if not self.enabled:
+            return
+
+        with self.lock:
+            timer = self.timers.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            timer['count'] += 1
+            timer['total_seconds'] += seconds
+            timer['max_seconds'] = max(timer['max_seconds'], seconds)
+
+    def increment(self, name: str, value: int = 1):
+        '''
+        This function adds a value to a counter
+
+        Args:
+            - name: Name of the counter
+            - value: Amount added
+        '''
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name: str):
+        '''
+        This function times the block it wraps
+
+        Args:
+            - name: Name of the timer
+        '''
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+
+    @contextmanager
+    def profile(self, name: str):
+        '''
+        This function times the block it wraps and, when configured, profiles it with cProfile and records its peak
+        memory with tracemalloc. The peak covers every thread, so it includes blocks running at the same time
+
+        Args:
+            - name: Name of the timer and of the profile file
+        '''
+        if not self.enabled:
+            yield
+            return
+
+        profiler = None
+        if self.config.cprofile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # only one profiler can be active at a time
+                logging.warning(f"Not profiling {name}, another block is being profiled")
+                profiler = None
+
+        if self.config.tracemalloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        try:
+            with self.timer(name):
+                yield
+        finally:
+            if self.config.tracemalloc:
+                current, peak = tracemalloc.get_traced_memory()
+                with self.lock:
+                    self.memory[name] = {'current_mb': current / 1024 ** 2, 'peak_mb': peak / 1024 ** 2}
+
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.config.profile_dir, exist_ok=True)
+                profile_path = os.path.join(self.config.profile_dir, f"{name.lower().replace(' ', '_')}.prof")
+                profiler.dump_stats(profile_path)
+                with self.lock:
+                    self.profiles[name] = profile_path
+
+    def snapshot(self) -> dict:
+        '''
+        This function returns the recorded metrics
+
+        Returns:
+            - dict: Timers with their count, total, mean and maximum in seconds, counters, memory peaks in megabytes and profile paths
+        '''
+        with self.lock:
+            return {
+                'timers': {
+                    name: {**timer, 'mean_seconds': timer['total_seconds'] / timer['count']}
+                    for name, timer in self.timers.items()
+                },
+                'counters': dict(self.counters),
+                'memory': dict(self.memory),
+                'profiles': dict(self.profiles)
+            }
+
+    def save(self, path: str = None):
+        '''
+        This function saves the recorded metrics to a JSON file with sorted keys, so that runs can be diffed
+
+        Args:
+            - path: Path of the JSON file, defaults to the configured metrics path
+        '''
+        try:
+            if not self.enabled:
+                return
+
+            path = path or self.config.metrics_path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                json.dump(self.snapshot(), file, indent=4, sort_keys=True)
+
+            logging.info(f"Instrumentation metrics have been saved at {path}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+# shared by every module of the process
+instrumentation = Instrumentation()
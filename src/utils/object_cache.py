@@ -0,0 +1,65 @@
+import os
+import sys
+import pickle
+import threading
+from src.logger import logging
+from src.exception import CustomException
+
+# this module is on the serving import path, so it only imports the standard library and the project logger
+
+# process-wide cache of loaded objects, keyed by absolute path
+_OBJECT_CACHE = {}
+_OBJECT_CACHE_LOCK = threading.Lock()
+
+def load_object(object_path: str):
+    '''Load the model from the joblib file
+
+    Args:
+        object_path (str): Path to the joblib file
+
+    Returns:
+        object: Model loaded from the joblib file
+
+    Raises:
+        CustomException: If there is an error loading the model
+    '''
+    try:
+        logging.info(f"Loading model from path {object_path}")
+        with open(object_path, 'rb') as file:
+            object = pickle.load(file)
+        logging.info(f"Model loaded from path {object_path}")
+        return object
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def load_cached_object(object_path: str):
+    '''Load the object from the file through a process-wide cache
+
+    The cache is keyed by the absolute path of the file and invalidated whenever the
+    modification time or size of the file changes, so a retrained model is picked up
+    without restarting the process.
+
+    Args:
+        object_path (str): Path to the file
+
+    Returns:
+        object: Object loaded from the file or from the cache
+
+    Raises:
+        CustomException: If there is an error loading the object
+    '''
+    try:
+        file_stat = os.stat(object_path)
+        version = (file_stat.st_mtime_ns, file_stat.st_size)
+        cache_key = os.path.abspath(object_path)
+
+        with _OBJECT_CACHE_LOCK:
+            cached = _OBJECT_CACHE.get(cache_key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            object = load_object(object_path)
+            _OBJECT_CACHE[cache_key] = (version, object)
+            return object
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,226 @@
+import os
+import sys
+import ast
+import json
+import types
+import hashlib
+import importlib.util
+import numpy as np
+import pandas as pd
+import scipy.sparse
+from src.logger import logging
+from src.exception import CustomException
+from src.entity.config_entity import StageCacheConfig
+
+
+def compute_fingerprint(path) -> str:
+    '''
+    This function computes a content hash of a file, or of every file in a directory
+
+    Args:
+        - path: Path to a file or directory
+
+    Returns:
+        - str: sha256 hex digest of the content
+    '''
+    digest = hashlib.sha256()
+
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(compute_fingerprint(file_path).encode())
+        return digest.hexdigest()
+
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_input(stage_input) -> str:
+    '''
+    This function hashes one input of a computation: arrays, sparse matrices and dataframes by their values,
+    paths of existing files or directories by their content, anything else by its JSON representation
+
+    Args:
+        - stage_input: Array, sparse matrix, dataframe, path or JSON serializable value
+
+    Returns:
+        - str: sha256 hex digest of the input
+    '''
+    if isinstance(stage_input, np.ndarray):
+        return hashlib.sha256(np.ascontiguousarray(stage_input).tobytes()).hexdigest()
+
+    if scipy.sparse.issparse(stage_input):
+        stage_input = stage_input.tocsr()
+        digest = hashlib.sha256(str(stage_input.shape).encode())
+        for part in (stage_input.data, stage_input.indices, stage_input.indptr):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        return digest.hexdigest()
+
+    if isinstance(stage_input, pd.DataFrame):
+        digest = hashlib.sha256(json.dumps([str(column) for column in stage_input.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(stage_input, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    if isinstance(stage_input, (str, os.PathLike)) and os.path.exists(stage_input):
+        return compute_fingerprint(stage_input)
+
+    return hashlib.sha256(json.dumps(stage_input, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_code_files(*objects) -> list:
+    '''
+    This function lists the source files a stage depends on: the modules of the given classes or functions and every
+    project module they import, directly or through other project modules, including the imports inside functions
+
+    Args:
+        - objects: Classes, functions or modules run by the stage
+
+    Returns:
+        - list: Paths of the source files, sorted by module name
+    '''
+    package = __name__.split('.')[0]
+    files = {}
+    pending = [obj.__name__ if isinstance(obj, types.ModuleType) else obj.__module__ for obj in objects]
+
+    while pending:
+        name = pending.pop()
+        if name in files or name.split('.')[0] != package:
+            continue
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            # a name imported from a module rather than a module
+            continue
+        if spec is None or spec.origin is None:
+            continue
+        files[name] = spec.origin
+
+        with open(spec.origin, 'r') as file:
+            tree = ast.parse(file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+                pending.extend(f"{node.module}.{alias.name}" for alias in node.names)
+
+    return [files[name] for name in sorted(files)]
+
+
+class StageCache:
+    '''
+    Class to skip pipeline stages whose inputs, configuration and code have not changed since their last run
+    '''
+    def __init__(self, config: StageCacheConfig):
+        self.config = config
+
+    def compute_key(self, config_section, inputs: list, code_files: list) -> str:
+        '''
+        This function computes the cache key of a stage run
+
+        Args:
+            - config_section: Configuration of the stage, must be JSON serializable
+            - inputs: Fingerprints, arrays or paths of the input data of the stage, arrays and paths are hashed by content
+            - code_files: Source files the stage depends on
+
+        Returns:
+            - str: sha256 hex digest identifying the stage run
+        '''
+        try:
+            digest = hashlib.sha256()
+            digest.update(json.dumps(config_section, sort_keys=True, default=str).encode())
+
+            for stage_input in inputs:
+                digest.update(fingerprint_input(stage_input).encode())
+
+            for code_file in code_files:
+                digest.update(compute_fingerprint(code_file).encode())
+
+            return digest.hexdigest()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_manifest_path(self, stage_name: str) -> str:
+        '''
+        This function returns the path of the manifest recording the last run of a stage
+        '''
+        return os.path.join(self.config.root_dir, f"{stage_name.lower().replace(' ', '_')}.json")
+
+    def load(self, stage_name: str, key: str):
+        '''
+        This function looks up the last run of a stage, which can be reused when caching is enabled, the run had the same key and its outputs are unchanged
+
+        Args:
+            - stage_name: Name of the stage
+            - key: Cache key of the current run
+
+        Returns:
+            - list: Paths of the outputs of the last run in the order they were saved, None if the stage has to run
+        '''
+        try:
+            manifest_path = self.get_manifest_path(stage_name)
+            if not self.config.enabled or not os.path.exists(manifest_path):
+                return None
+
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+
+            if manifest['key'] != key:
+                return None
+
+            for output, signature in manifest['outputs'].items():
+                if not os.path.exists(output) or self.get_output_signature(output) != signature:
+                    logging.info(f"Output {output} of {stage_name} has changed since it was cached")
+                    return None
+
+            logging.info(f"Inputs of {stage_name} are unchanged, reusing its cached outputs")
+            return list(manifest['outputs'])
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_output_signature(self, path) -> list:
+        '''
+        This function returns a cheap signature of an output file or directory, its size and modification time
+        '''
+        if os.path.isdir(path):
+            return sorted(
+                [os.path.relpath(os.path.join(root, name), path)] + self.get_output_signature(os.path.join(root, name))
+                for root, _, files in os.walk(path) for name in files
+            )
+
+        file_stat = os.stat(path)
+        return [file_stat.st_size, file_stat.st_mtime_ns]
+
+    def save(self, stage_name: str, key: str, outputs: list):
+        '''
+        This function records a completed stage run
+
+        Args:
+            - stage_name: Name of the stage
+            - key: Cache key of the run
+            - outputs: Paths of the files or directories written by the stage
+        '''
+        try:
+            if not self.config.enabled:
+                return
+
+            os.makedirs(self.config.root_dir, exist_ok=True)
+            manifest = {
+                'key': key,
+                'outputs': {str(output): self.get_output_signature(output) for output in outputs}
+            }
+
+            manifest_path = self.get_manifest_path(stage_name)
+            with open(manifest_path, 'w') as file:
+                json.dump(manifest, file, indent=4)
+
+            logging.info(f"Cached the outputs of {stage_name} at {manifest_path}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
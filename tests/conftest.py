@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from src.components.data_transformation import DataTransformation
+from src.entity.config_entity import DataTransformationConfig
+from src.utils.common import save_object
+
+
+@pytest.fixture(scope='session')
+def applicants() -> pd.DataFrame:
+    '''
+    Applicants with the columns of the admission table, international as the strings the database returns.
+    International applicants are admitted more often, so a model that ignores the feature gives different probabilities
+    '''
+    rng = np.random.default_rng(0)
+    n_rows = 400
+    international = rng.random(n_rows) < 0.3
+    score = rng.normal(0, 1, n_rows) + 2 * international
+
+    return pd.DataFrame({
+        'application_id': np.arange(1, n_rows + 1),
+        'gender': rng.choice(['Male', 'Female'], n_rows),
+        'international': np.where(international, 'True', 'False'),
+        'gpa': rng.normal(3.25, 0.15, n_rows).round(2),
+        'major': rng.choice(['Humanities', 'STEM', 'Business'], n_rows),
+        'race': np.where(international, None, rng.choice(['White', 'Asian', 'Black', 'Hispanic', 'Other'], n_rows)),
+        'gmat': rng.normal(651, 49, n_rows).round(-1),
+        'work_exp': rng.normal(5, 1, n_rows).round(),
+        'work_industry': rng.choice(['Consulting', 'Technology', 'PE/VC'], n_rows),
+        'admission': np.where(score > 1.5, 'Admit', np.where(score > 1.0, 'Waitlist', None))
+    })
+
+
+@pytest.fixture(scope='session')
+def trained_artifacts(applicants, tmp_path_factory) -> dict:
+    '''
+    Preprocessor, compiled preprocessor and model trained on the applicants the way the training pipeline does
+
+    Returns:
+        - dict: Paths of the preprocessor, the compiled preprocessor and the model
+    '''
+    directory = tmp_path_factory.mktemp('artifacts')
+    config = DataTransformationConfig(
+        preprocessor_obj_path = str(directory / 'preprocessor.joblib'),
+        compiled_preprocessor_obj_path = str(directory / 'compiled_preprocessor.pkl'),
+        train_arr = str(directory / 'train_arr.npy'),
+        test_arr = str(directory / 'test_arr.npy'),
+        train_target = str(directory / 'train_target.npy'),
+        test_target = str(directory / 'test_target.npy'),
+        sparse = False,
+        dtype = 'float64'
+    )
+
+    train_arr, train_target, _, _, _ = DataTransformation(config).initiate_data_transformation(
+        training_data=applicants.iloc[:300], testing_data=applicants.iloc[300:]
+    )
+
+    model_path = str(directory / 'model.pkl')
+    save_object(LogisticRegression(max_iter=1000).fit(train_arr, train_target), model_path)
+
+    return {
+        'preprocessor_path': config.preprocessor_obj_path,
+        'compiled_preprocessor_path': config.compiled_preprocessor_obj_path,
+        'model_path': model_path
+    }
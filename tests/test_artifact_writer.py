@@ -0,0 +1,40 @@
+import time
+import pytest
+from src.exception import CustomException
+from src.utils.artifact_writer import ArtifactWriter
+from src.utils.common import save_object
+
+
+def test_synchronous_write_raises_its_error(tmp_path):
+    writer = ArtifactWriter(asynchronous=False)
+
+    with pytest.raises(CustomException):
+        writer.submit(save_object, object=1, object_path=str(tmp_path / 'missing' / 'model.pkl'))
+
+
+def test_write_after_a_failed_write_is_skipped(tmp_path):
+    written = []
+    writer = ArtifactWriter(asynchronous=True)
+    writer.submit(save_object, object=1, object_path=str(tmp_path / 'missing' / 'model.pkl'))
+    manifest = writer.submit_when_written(written.append, 'manifest')
+
+    with pytest.raises(CustomException):
+        writer.close()
+
+    assert written == []
+    assert manifest.exception() is not None
+
+
+def test_independent_writes_run_concurrently_and_the_manifest_waits_for_them():
+    finished = []
+    writer = ArtifactWriter(asynchronous=True, max_workers=3)
+
+    start = time.perf_counter()
+    for name in ['raw', 'train', 'test']:
+        writer.submit(lambda name: (time.sleep(0.2), finished.append(name)), name)
+    writer.submit_when_written(lambda: finished.append('manifest'))
+    writer.close()
+
+    assert time.perf_counter() - start < 0.5
+    assert sorted(finished[:3]) == ['raw', 'test', 'train']
+    assert finished[3] == 'manifest'
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.components.feature_encoding import normalize_features
+from src.utils.object_cache import load_object
+from src.pipeline.stage_04_predict_pipeline import CustomData, PredictionPipeline, FEATURE_COLUMNS
+from src.pipeline.stage_05_batch_predict_pipeline import BatchPredictionPipeline
+from src.pipeline.stage_06_prediction_service import parse_payload
+
+
+APPLICANT = {'gender': 'Male', 'gpa': 3.5, 'major': 'STEM', 'race': None, 'gmat': 700.0, 'work_exp': 5.0,
+             'work_industry': 'Consulting'}
+
+
+@pytest.fixture(params=['compiled', 'fitted'])
+def prediction_pipeline(request, trained_artifacts) -> PredictionPipeline:
+    '''
+    Prediction pipeline serving with the compiled preprocessor, or with the fitted ColumnTransformer
+    '''
+    compiled_preprocessor_path = trained_artifacts['compiled_preprocessor_path'] if request.param == 'compiled' else ''
+    return PredictionPipeline(preprocessor_path=trained_artifacts['preprocessor_path'],
+                              model_path=trained_artifacts['model_path'],
+                              compiled_preprocessor_path=compiled_preprocessor_path)
+
+
+def test_compiled_preprocessor_matches_column_transformer(applicants, trained_artifacts):
+    preprocessor = load_object(trained_artifacts['preprocessor_path'])
+    compiled_preprocessor = load_object(trained_artifacts['compiled_preprocessor_path'])
+    features = normalize_features(applicants[FEATURE_COLUMNS])
+
+    expected = preprocessor.transform(features)
+
+    np.testing.assert_allclose(compiled_preprocessor.transform(features), expected)
+    for index, record in enumerate(features.head(20).to_dict('records')):
+        np.testing.assert_allclose(compiled_preprocessor.transform_record(record), expected[index:index + 1])
+
+
+@pytest.mark.parametrize('international', [True, 'True', 'true', 1])
+def test_international_applicant_is_scored_as_in_training(prediction_pipeline, international):
+    _, trained_category = prediction_pipeline.predict_proba({**APPLICANT, 'international': 'True'})
+    _, domestic = prediction_pipeline.predict_proba({**APPLICANT, 'international': 'False'})
+
+    _, single = prediction_pipeline.predict_proba({**APPLICANT, 'international': international})
+    _, batch = prediction_pipeline.predict_proba(pd.DataFrame([{**APPLICANT, 'international': international}]))
+
+    np.testing.assert_allclose(single, trained_category)
+    np.testing.assert_allclose(batch, trained_category)
+    assert not np.allclose(trained_category, domestic)
+
+
+def test_service_payload_is_scored_like_the_app(prediction_pipeline):
+    records, _ = parse_payload({**APPLICANT, 'international': True})
+    app_record = CustomData(**{**APPLICANT, 'international': 'True'}).get_data_as_dict()
+
+    _, served = prediction_pipeline.predict_proba(records[0])
+    _, app = prediction_pipeline.predict_proba(app_record)
+
+    np.testing.assert_allclose(served, app)
+
+
+def test_csv_and_parquet_inputs_are_scored_alike(applicants, trained_artifacts, tmp_path):
+    features = applicants.drop(columns=['admission'])
+    inputs = {
+        'csv': tmp_path / 'applicants.csv',
+        'parquet_strings': tmp_path / 'applicants_strings.parquet',
+        'parquet_booleans': tmp_path / 'applicants_booleans.parquet'
+    }
+    features.to_csv(inputs['csv'], index=False)
+    features.to_parquet(inputs['parquet_strings'], index=False)
+    features.assign(international=features['international'] == 'True').to_parquet(inputs['parquet_booleans'], index=False)
+
+    scored = {}
+    for name, input_path in inputs.items():
+        output_path = tmp_path / f'{name}_predictions.csv'
+        BatchPredictionPipeline(str(input_path), str(output_path), chunksize=150,
+                                preprocessor_path=trained_artifacts['preprocessor_path'],
+                                model_path=trained_artifacts['model_path']).main()
+        scored[name] = pd.read_csv(output_path)
+
+    pd.testing.assert_frame_equal(scored['csv'], scored['parquet_strings'])
+    pd.testing.assert_frame_equal(scored['csv'], scored['parquet_booleans'])
+
+
+def test_explicit_preprocessor_is_not_replaced_by_the_default_compiled_file(trained_artifacts):
+    pipeline = PredictionPipeline(preprocessor_path=trained_artifacts['preprocessor_path'],
+                                  model_path=trained_artifacts['model_path'])
+
+    preprocessor, _ = pipeline.load_artifacts()
+
+    assert type(preprocessor).__name__ == 'ColumnTransformer'
@@ -0,0 +1,40 @@
+import pytest
+from src.pipeline.stage_06_prediction_service import parse_payload
+
+
+APPLICANT = {'gender': 'Female', 'international': False, 'gpa': 3.2, 'major': 'Business', 'race': 'White',
+             'gmat': 640, 'work_exp': 4, 'work_industry': 'Technology'}
+
+
+def test_single_applicant_is_coerced_to_the_training_types():
+    records, is_batch = parse_payload({**APPLICANT, 'international': 'true', 'gmat': '640'})
+
+    assert not is_batch
+    assert records[0]['international'] == 'True'
+    assert records[0]['gmat'] == 640.0
+
+
+@pytest.mark.parametrize('payload', [[APPLICANT], {'instances': [APPLICANT, APPLICANT]}])
+def test_batches_are_parsed(payload):
+    records, is_batch = parse_payload(payload)
+
+    assert is_batch
+    assert all(record['international'] == 'False' for record in records)
+
+
+@pytest.mark.parametrize('payload', [
+    [],
+    {'instances': []},
+    {**APPLICANT, 'gpa': 'high'},
+    {**APPLICANT, 'gpa': float('inf')},
+    {**APPLICANT, 'gmat': True},
+    {**APPLICANT, 'international': 'maybe'},
+    {**APPLICANT, 'international': 1.0},
+    {**APPLICANT, 'major': 3},
+    {key: value for key, value in APPLICANT.items() if key != 'race'},
+    {**APPLICANT, 'admission': 'Admit'},
+    ['not an applicant']
+])
+def test_invalid_payloads_are_rejected(payload):
+    with pytest.raises(ValueError):
+        parse_payload(payload)
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import numpy as np
+import pytest
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_building_and_evaluation import ModelBuilding
+from src.entity.config_entity import DataIngestionConfig, StageCacheConfig
+from src.utils.stage_cache import StageCache, get_code_files
+
+
+@pytest.fixture
+def stage_cache(tmp_path) -> StageCache:
+    return StageCache(StageCacheConfig(root_dir=str(tmp_path / 'stage_cache'), enabled=True))
+
+
+@pytest.fixture
+def code_file(tmp_path) -> str:
+    path = tmp_path / 'component.py'
+    path.write_text('VALUE = 1\n')
+    return str(path)
+
+
+def test_key_is_stable_for_the_same_run(stage_cache, code_file):
+    inputs = [np.arange(10), {'row_count': '10'}]
+
+    assert stage_cache.compute_key({'cv': 5}, inputs, [code_file]) == stage_cache.compute_key({'cv': 5}, inputs, [code_file])
+
+
+def test_key_changes_with_config_inputs_and_code(stage_cache, code_file):
+    key = stage_cache.compute_key({'cv': 5}, [np.arange(10)], [code_file])
+
+    assert stage_cache.compute_key({'cv': 3}, [np.arange(10)], [code_file]) != key
+    assert stage_cache.compute_key({'cv': 5}, [np.arange(1, 11)], [code_file]) != key
+
+    with open(code_file, 'a') as file:
+        file.write('VALUE = 2\n')
+    assert stage_cache.compute_key({'cv': 5}, [np.arange(10)], [code_file]) != key
+
+
+@pytest.mark.parametrize('component, modules', [
+    (DataIngestion, ['components/data_ingestion.py', 'utils/common.py']),
+    (DataTransformation, ['components/data_transformation.py', 'components/compiled_preprocessor.py',
+                          'components/label_encoding.py', 'components/feature_encoding.py', 'utils/common.py']),
+    (ModelBuilding, ['components/model_building_and_evaluation.py', 'components/resampling.py',
+                     'components/boosting.py', 'utils/common.py'])
+])
+def test_code_files_include_every_module_the_stage_imports(component, modules):
+    code_files = [path.replace(os.sep, '/') for path in get_code_files(component)]
+
+    for module in modules:
+        assert any(path.endswith(f'src/{module}') for path in code_files), module
+
+
+def test_cached_outputs_are_reused_only_for_the_same_key_and_unchanged_files(stage_cache, tmp_path):
+    output = tmp_path / 'train.npy'
+    np.save(output, np.arange(10))
+    stage_cache.save('Data Transformation', 'key', outputs=[str(output)])
+
+    assert stage_cache.load('Data Transformation', 'key') == [str(output)]
+    assert stage_cache.load('Data Transformation', 'other key') is None
+
+    np.save(output, np.arange(20))
+    assert stage_cache.load('Data Transformation', 'key') is None
+
+
+def test_ingestion_fingerprint_changes_when_a_row_is_edited(applicants, tmp_path):
+    sqlite_path = str(tmp_path / 'admission.db')
+    with sqlite3.connect(sqlite_path) as connection:
+        applicants.to_sql('admission', connection, index=False)
+
+    columns = list(applicants.columns)
+    config = DataIngestionConfig(
+        raw_data_path=str(tmp_path / 'raw.csv'), train_data_path=str(tmp_path / 'train.csv'),
+        test_data_path=str(tmp_path / 'test.csv'), source='sqlite', sqlite_path=sqlite_path, table_name='admission',
+        columns=columns, streaming=False, chunksize=100, incremental=False,
+        watermark_path=str(tmp_path / 'watermark.json'), partitions_dir=str(tmp_path / 'partitions'),
+        categorical_columns=[], float_columns=[]
+    )
+    data_ingestion = DataIngestion(config)
+    fingerprint = data_ingestion.get_source_fingerprint()
+
+    assert data_ingestion.get_source_fingerprint() == fingerprint
+
+    decision = 'Waitlist' if applicants['admission'].iloc[0] == 'Admit' else 'Admit'
+    with sqlite3.connect(sqlite_path) as connection:
+        connection.execute("UPDATE admission SET admission = ? WHERE application_id = 1", (decision,))
+
+    edited = data_ingestion.get_source_fingerprint()
+    assert edited['row_count'] == fingerprint['row_count']
+    assert edited != fingerprint